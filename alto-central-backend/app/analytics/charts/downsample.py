@@ -0,0 +1,108 @@
+"""Point reduction for large chart traces.
+
+Selects a subset of indices that preserves the visual shape of a series,
+so long time ranges don't ship (and render) more points than the chart
+has pixels for.
+"""
+
+import numpy as np
+
+
+def _bucket_minmax(y: np.ndarray, n_buckets: int):
+    """Split y into equal-count buckets and locate each bucket's extremes.
+
+    Returns:
+        Tuple of (bucket starts, bucket ends, argmin indices, argmax indices)
+    """
+    n = len(y)
+    bucket = np.arange(n) * n_buckets // n
+    # Sort by bucket, then by value: each bucket's min/max sit at its edges
+    order = np.lexsort((y, bucket))
+    starts = np.searchsorted(bucket, np.arange(n_buckets))
+    ends = np.append(starts[1:], n)
+    return starts, ends, order[starts], order[ends - 1]
+
+
+def m4_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """M4 downsampling for an ordered series (e.g. a timeseries).
+
+    Keeps the first, last, min and max point of each of n_out / 4 buckets,
+    which preserves the line's visual envelope.
+
+    Args:
+        y: Values in x order (NaN allowed)
+        n_out: Target number of points
+
+    Returns:
+        Sorted indices of points to keep
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    starts, ends, imin, imax = _bucket_minmax(y, max(n_out // 4, 1))
+    return np.unique(np.concatenate([starts, ends - 1, imin, imax]))
+
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets over x-sorted finite points."""
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs(
+            (x[a] - next_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax_lttb_indices(
+    x: np.ndarray,
+    y: np.ndarray,
+    n_out: int,
+    minmax_ratio: int = 4,
+) -> np.ndarray:
+    """MinMaxLTTB downsampling for x/y point sets.
+
+    Points are ordered by x, reduced to per-bucket min/max candidates
+    (minmax_ratio * n_out of them), then LTTB picks the final n_out.
+    Non-finite points are dropped.
+
+    Args:
+        x: X values (any order)
+        y: Y values
+        n_out: Target number of points
+        minmax_ratio: Candidates kept per output point before LTTB
+
+    Returns:
+        Indices into x/y of points to keep, in x order
+    """
+    valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    if len(valid) <= n_out:
+        return valid
+
+    order = valid[np.argsort(x[valid], kind="stable")]
+    xs, ys = x[order], y[order]
+
+    if len(order) > n_out * minmax_ratio:
+        _, _, imin, imax = _bucket_minmax(ys, n_out * minmax_ratio // 2)
+        candidates = np.unique(np.concatenate([[0, len(order) - 1], imin, imax]))
+    else:
+        candidates = np.arange(len(order))
+
+    chosen = _lttb_indices(xs[candidates], ys[candidates], n_out)
+    return order[candidates[chosen]]
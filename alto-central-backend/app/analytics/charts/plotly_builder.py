@@ -60,9 +60,10 @@ class PlotlyBuilder:
         Returns:
             Complete Plotly figure specification
         """
+        x_values = [d.get(x_field) for d in data]
+
         traces = []
         for i, y_field in enumerate(y_fields):
-            x_values = [d.get(x_field) for d in data]
             y_values = [d.get(y_field) for d in data]
 
             name = series_names[i] if series_names and i < len(series_names) else y_field
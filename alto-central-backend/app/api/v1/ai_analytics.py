@@ -4,13 +4,13 @@ Provides natural language chart generation and template management.
 """
 
 import asyncio
-import json
 import logging
 from datetime import datetime
 from typing import Any, AsyncGenerator, Dict, List, Optional
 
+import orjson
 from fastapi import APIRouter, HTTPException, Path, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.analytics.service import get_analytics_service
@@ -21,6 +21,15 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Chart results carry large plotly_spec payloads that may include numpy
+# arrays and naive UTC datetimes
+_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+
+
+def _sse_event(payload: Dict[str, Any]) -> str:
+    """Encode a payload as a server-sent event line."""
+    return f"data: {orjson.dumps(payload, default=str, option=_JSON_OPTIONS).decode()}\n\n"
+
 
 # Request/Response Schemas
 
@@ -103,6 +112,7 @@ class CreateTemplateRequest(BaseModel):
 @router.post(
     "/chart",
     response_model=ChartGenerationResponse,
+    response_class=ORJSONResponse,
     summary="Generate chart from prompt",
     description="Generate a chart from a natural language description. Will try template matching first, then AI generation.",
 )
@@ -157,22 +167,22 @@ async def generate_chart_stream(
         """Generate SSE events for chart generation progress."""
         try:
             # Send start event
-            yield f"data: {json.dumps({'event': 'start', 'message': 'Starting chart generation...'})}\n\n"
+            yield _sse_event({'event': 'start', 'message': 'Starting chart generation...'})
 
             site = get_site_by_id(site_id)
             if site is None:
-                yield f"data: {json.dumps({'event': 'error', 'message': f'Site {site_id} not found'})}\n\n"
+                yield _sse_event({'event': 'error', 'message': f'Site {site_id} not found'})
                 return
 
-            yield f"data: {json.dumps({'event': 'progress', 'message': f'Site: {site.site_name}', 'step': 1})}\n\n"
+            yield _sse_event({'event': 'progress', 'message': f'Site: {site.site_name}', 'step': 1})
 
             service = get_analytics_service(site_id, site.site_name)
 
             # Check for template match
-            yield f"data: {json.dumps({'event': 'progress', 'message': 'Checking templates...', 'step': 2})}\n\n"
+            yield _sse_event({'event': 'progress', 'message': 'Checking templates...', 'step': 2})
 
             # Generate chart
-            yield f"data: {json.dumps({'event': 'progress', 'message': 'Generating chart...', 'step': 3})}\n\n"
+            yield _sse_event({'event': 'progress', 'message': 'Generating chart...', 'step': 3})
 
             result = await service.generate_chart(
                 prompt=request.prompt,
@@ -181,16 +191,16 @@ async def generate_chart_stream(
 
             if result.get("template_used"):
                 template_name = result["template_used"]
-                yield f"data: {json.dumps({'event': 'progress', 'message': f'Using template: {template_name}', 'step': 4})}\n\n"
+                yield _sse_event({'event': 'progress', 'message': f'Using template: {template_name}', 'step': 4})
             else:
-                yield f"data: {json.dumps({'event': 'progress', 'message': 'AI generating chart...', 'step': 4})}\n\n"
+                yield _sse_event({'event': 'progress', 'message': 'AI generating chart...', 'step': 4})
 
             # Send final result
-            yield f"data: {json.dumps({'event': 'complete', 'result': result})}\n\n"
+            yield _sse_event({'event': 'complete', 'result': result})
 
         except Exception as e:
             logger.error(f"Streaming error: {e}", exc_info=True)
-            yield f"data: {json.dumps({'event': 'error', 'message': str(e)})}\n\n"
+            yield _sse_event({'event': 'error', 'message': str(e)})
 
     return StreamingResponse(
         event_generator(),
@@ -206,6 +216,7 @@ async def generate_chart_stream(
 @router.post(
     "/chart/from-template/{template_id}",
     response_model=ChartGenerationResponse,
+    response_class=ORJSONResponse,
     summary="Generate chart from template",
     description="Generate a chart using a specific template with parameters.",
 )
@@ -56,6 +56,11 @@ class Settings:
 
     # LLM (Anthropic)
     ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
+    # Keep the system prompt/tool cache warm between requests (costs a
+    # small cached-read request every few minutes)
+    ANTHROPIC_CACHE_KEEPALIVE: bool = (
+        os.getenv("ANTHROPIC_CACHE_KEEPALIVE", "false").lower() == "true"
+    )
 
 
 # Global settings instance
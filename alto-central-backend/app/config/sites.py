@@ -202,13 +202,18 @@ def get_sites() -> List[SiteConfig]:
     return config.sites
 
 
+@lru_cache
+def _sites_by_id() -> Dict[str, SiteConfig]:
+    """Index of the loaded sites by site_id (first entry wins)."""
+    sites: Dict[str, SiteConfig] = {}
+    for site in load_sites_config().sites:
+        sites.setdefault(site.site_id, site)
+    return sites
+
+
 def get_site_by_id(site_id: str) -> Optional[SiteConfig]:
     """Get a specific site by its ID."""
-    config = load_sites_config()
-    for site in config.sites:
-        if site.site_id == site_id:
-            return site
-    return None
+    return _sites_by_id().get(site_id)
 
 
 def get_site_timescale_config(site_id: str) -> Optional[TimescaleConfig]:
@@ -238,4 +243,5 @@ def get_site_mongodb_config(site_id: str) -> Optional[MongoDBConfig]:
 def reload_config() -> SitesConfig:
     """Force reload the configuration (clears cache)."""
     load_sites_config.cache_clear()
+    _sites_by_id.cache_clear()
     return load_sites_config()
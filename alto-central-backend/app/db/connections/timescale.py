@@ -6,16 +6,82 @@ Each site can have its own TimescaleDB instance configured in sites.yaml.
 Configuration is loaded per-site from config/sites.yaml.
 """
 
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
 import logging
+import ssl
+import time
+
+import asyncpg
 
 from app.config.sites import get_site_timescale_config, TimescaleConfig
 from app.core.exceptions import ExternalServiceException
 
 logger = logging.getLogger(__name__)
 
+# SSL contexts per ssl_mode, built once and shared by every site's pool
+# (ssl_mode == "disable" -> no context)
+_SSL_REQUIRE = ssl.create_default_context()
+_SSL_REQUIRE.check_hostname = False
+_SSL_REQUIRE.verify_mode = ssl.CERT_NONE
+_SSL_VERIFY_FULL = ssl.create_default_context()
+_SSL_CONTEXTS: Dict[str, ssl.SSLContext] = {
+    "require": _SSL_REQUIRE,
+    "verify-full": _SSL_VERIFY_FULL,
+}
+
+# Result cache TTLs (seconds) for frequently repeated dashboard queries
+LATEST_CACHE_TTL = 30
+DAILY_ENERGY_CACHE_TTL = 300
+RESULT_CACHE_MAX_ENTRIES = 64
+
+# Continuous aggregates over aggregated_data, keyed by resample interval.
+# Used when present on the site's database as real-time aggregates
+# (materialized_only = false, so the newest buckets are computed from raw
+# rows); otherwise queries fall back to time_bucket over raw rows.
+# Expected definition (1 hour shown):
+#
+#   CREATE MATERIALIZED VIEW aggregated_data_1h
+#   WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+#   SELECT time_bucket('1 hour', timestamp) AS bucket,
+#          site_id, device_id, datapoint, avg(value) AS value
+#   FROM aggregated_data
+#   GROUP BY 1, 2, 3, 4;
+CONTINUOUS_AGGREGATES: Dict[str, Tuple[str, str]] = {
+    "15m": ("aggregated_data_15m", "15 minutes"),
+    "15 minutes": ("aggregated_data_15m", "15 minutes"),
+    "1h": ("aggregated_data_1h", "1 hour"),
+    "1 hour": ("aggregated_data_1h", "1 hour"),
+    "1d": ("aggregated_data_1d", "1 day"),
+    "1 day": ("aggregated_data_1d", "1 day"),
+}
+
+# Server-side aggregation for query_aggregate: SQL aggregate per aggregation
+# name, and group key columns per group_by (computed in UTC)
+AGGREGATE_FUNCTIONS: Dict[str, str] = {
+    "avg": "AVG",
+    "sum": "SUM",
+    "min": "MIN",
+    "max": "MAX",
+    "count": "COUNT",
+}
+AGGREGATE_GROUPS: Dict[str, Tuple[str, ...]] = {
+    "hour_of_day": ("EXTRACT(HOUR FROM timestamp AT TIME ZONE 'UTC')::int AS hour",),
+    "hour": ("time_bucket(INTERVAL '1 hour', timestamp) AS timestamp",),
+    "day": ("(time_bucket(INTERVAL '1 day', timestamp) AT TIME ZONE 'UTC')::date AS date",),
+    "week": (
+        "EXTRACT(ISOYEAR FROM timestamp AT TIME ZONE 'UTC')::int AS year",
+        "EXTRACT(WEEK FROM timestamp AT TIME ZONE 'UTC')::int AS week",
+    ),
+    "month": (
+        "EXTRACT(YEAR FROM timestamp AT TIME ZONE 'UTC')::int AS year",
+        "EXTRACT(MONTH FROM timestamp AT TIME ZONE 'UTC')::int AS month",
+    ),
+}
+
 
 class TimescaleConnection:
     """READ-ONLY connection to a site's TimescaleDB instance.
@@ -34,6 +100,12 @@ class TimescaleConnection:
         self.ssl_mode = config.ssl_mode
         self._pool = None
         self._connected = False
+        # key -> (expires_at, rows) in LRU order; one lock per key so
+        # concurrent misses for the same query share a single round-trip
+        self._result_cache: "OrderedDict[Tuple, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._cache_locks: Dict[Tuple, asyncio.Lock] = {}
+        # Continuous aggregate views that exist on this site's database
+        self._continuous_aggregates: set = set()
 
     async def connect(self) -> None:
         """Initialize the connection pool."""
@@ -43,18 +115,7 @@ class TimescaleConnection:
             return
 
         try:
-            import asyncpg
-            import ssl as ssl_module
-
-            # Configure SSL based on ssl_mode
-            ssl_context = None
-            if self.ssl_mode == "require":
-                ssl_context = ssl_module.create_default_context()
-                ssl_context.check_hostname = False
-                ssl_context.verify_mode = ssl_module.CERT_NONE
-            elif self.ssl_mode == "verify-full":
-                ssl_context = ssl_module.create_default_context()
-            # ssl_mode == "disable" -> ssl_context = None
+            ssl_context = _SSL_CONTEXTS.get(self.ssl_mode)
 
             self._pool = await asyncpg.create_pool(
                 host=self.host,
@@ -70,14 +131,61 @@ class TimescaleConnection:
                 server_settings={
                     "default_transaction_read_only": "on",
                     "statement_timeout": "30000",  # 30 second statement timeout (ms)
+                    # JIT startup cost outweighs its benefit on time_bucket scans
+                    "jit": "off",
+                    # Re-plan prepared statements with actual parameter values
+                    "plan_cache_mode": "force_custom_plan",
                 },
             )
             self._connected = True
             logger.info(f"Connected to TimescaleDB at {self.host}:{self.port} for site {self.site_id} (READ-ONLY)")
+            await self._discover_continuous_aggregates()
         except Exception as e:
             logger.error(f"Failed to connect to TimescaleDB for site {self.site_id}: {e}")
             self._connected = False
 
+    async def _discover_continuous_aggregates(self) -> None:
+        """Detect which CONTINUOUS_AGGREGATES views exist for resample routing.
+
+        Only real-time aggregates (materialized_only = false) are used: a
+        materialized-only view lacks the newest, not yet refreshed buckets,
+        so it would return stale results for recent time ranges.
+        """
+        view_names = sorted({view for view, _ in CONTINUOUS_AGGREGATES.values()})
+        try:
+            # Straight through the pool: a missing catalog is expected on
+            # plain Postgres and should not be logged as a query error
+            async with self._pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT view_name, materialized_only
+                    FROM timescaledb_information.continuous_aggregates
+                    WHERE view_name = ANY($1)
+                    """,
+                    view_names,
+                )
+        except (asyncpg.UndefinedTableError, asyncpg.InvalidSchemaNameError):
+            logger.debug(f"No continuous aggregate catalog for site {self.site_id}")
+            rows = []
+        except Exception as e:
+            logger.warning(f"Continuous aggregate discovery failed for site {self.site_id}: {e}")
+            rows = []
+
+        self._continuous_aggregates = {
+            row["view_name"] for row in rows if not row["materialized_only"]
+        }
+        skipped = sorted(row["view_name"] for row in rows if row["materialized_only"])
+        if skipped:
+            logger.info(
+                f"Skipping materialized-only continuous aggregates for site "
+                f"{self.site_id}: {skipped}"
+            )
+        if self._continuous_aggregates:
+            logger.info(
+                f"Using continuous aggregates for site {self.site_id}: "
+                f"{sorted(self._continuous_aggregates)}"
+            )
+
     async def close(self) -> None:
         """Close the connection pool."""
         if self._pool:
@@ -97,9 +205,10 @@ class TimescaleConnection:
                 "TimescaleDB", f"Not connected to database for site {self.site_id}"
             )
 
+        # Read-only mode is enforced per session via the pool's
+        # default_transaction_read_only server setting, so no extra
+        # round-trip is needed on acquire.
         async with self._pool.acquire() as conn:
-            # Ensure read-only mode at connection level
-            await conn.execute("SET TRANSACTION READ ONLY")
             yield conn
 
     async def fetch(self, query: str, *args) -> List[Dict[str, Any]]:
@@ -110,11 +219,66 @@ class TimescaleConnection:
         try:
             async with self.get_connection() as conn:
                 rows = await conn.fetch(query, *args)
-                return [dict(row) for row in rows]
+                if not rows:
+                    return []
+                # Resolve column names once instead of per-row dict(Record)
+                keys = tuple(rows[0].keys())
+                return [dict(zip(keys, row)) for row in rows]
         except Exception as e:
             logger.error(f"TimescaleDB query error for site {self.site_id}: {e}")
             raise ExternalServiceException("TimescaleDB", str(e))
 
+    async def _cached_fetch(
+        self,
+        key: Tuple,
+        ttl: float,
+        loader: Callable[[], Awaitable[List[Dict[str, Any]]]],
+    ) -> List[Dict[str, Any]]:
+        """Return cached rows for key, loading them at most once per TTL.
+
+        The cache is LRU-ordered and bounded by RESULT_CACHE_MAX_ENTRIES.
+        Each caller gets its own copy of the rows, so in-place edits never
+        leak into the cache or into other callers' results.
+        """
+        rows = self._cache_lookup(key)
+        if rows is None:
+            lock = self._cache_locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                # Another coroutine may have filled the cache while we waited
+                rows = self._cache_lookup(key)
+                if rows is None:
+                    try:
+                        rows = await loader()
+                    except BaseException:
+                        # Nothing was cached; don't keep a lock for the key
+                        if key not in self._result_cache:
+                            self._cache_locks.pop(key, None)
+                        raise
+                    self._cache_store(key, ttl, rows)
+        return [dict(row) for row in rows]
+
+    def _cache_lookup(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """Cached rows for key if still fresh, marking them most recently used."""
+        entry = self._result_cache.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        self._result_cache.move_to_end(key)
+        return entry[1]
+
+    def _cache_store(self, key: Tuple, ttl: float, rows: List[Dict[str, Any]]) -> None:
+        """Cache rows for key, evicting expired then least recently used entries."""
+        now = time.monotonic()
+        self._result_cache.pop(key, None)
+        evicted = [k for k, (expires_at, _) in self._result_cache.items() if expires_at <= now]
+        for k in evicted:
+            del self._result_cache[k]
+        while len(self._result_cache) >= RESULT_CACHE_MAX_ENTRIES:
+            evicted.append(self._result_cache.popitem(last=False)[0])
+        for k in evicted:
+            self._cache_locks.pop(k, None)
+
+        self._result_cache[key] = (now + ttl, rows)
+
     async def fetchval(self, query: str, *args) -> Any:
         """Execute a query and return a single value."""
         if not self.is_connected:
@@ -134,6 +298,7 @@ class TimescaleConnection:
         start_time: datetime,
         end_time: datetime,
         resample: Optional[str] = None,
+        min_filter: Optional[Tuple[str, float]] = None,
     ) -> List[Dict[str, Any]]:
         """Query timeseries data from aggregated_data with optional resampling.
 
@@ -143,6 +308,14 @@ class TimescaleConnection:
             start_time: Query start time
             end_time: Query end time
             resample: Optional resample interval (e.g., '1 hour', '15 minutes')
+            min_filter: Optional (datapoint, minimum). At timestamps where that
+                datapoint's (resampled) value is below the minimum, only its
+                own row is returned; the caller drops those timestamps and
+                can still count them, without the other datapoints' rows
+                crossing the wire.
+
+        Resampled queries are served from a continuous aggregate when one
+        exists for the interval (see CONTINUOUS_AGGREGATES).
 
         Returns empty list if not connected or query fails.
         """
@@ -150,52 +323,203 @@ class TimescaleConnection:
             return []
 
         try:
-            if resample:
-                # Use time_bucket for resampling
-                # Note: interval is embedded in SQL (safe - values come from resample_map)
+            source = self._timeseries_source(resample)
+            if min_filter is None:
                 query = f"""
-                    SELECT
-                        time_bucket(INTERVAL '{resample}', timestamp) as timestamp,
-                        device_id,
-                        datapoint,
-                        AVG(value) as value
-                    FROM aggregated_data
-                    WHERE site_id = $1
-                      AND device_id = $2
-                      AND datapoint = ANY($3)
-                      AND timestamp >= $4
-                      AND timestamp < $5
-                    GROUP BY 1, 2, 3
-                    ORDER BY timestamp
-                """
-                return await self.fetch(
-                    query, self.site_id, device_id, datapoints,
-                    start_time, end_time
-                )
-            else:
-                query = """
-                    SELECT timestamp, device_id, datapoint, value
-                    FROM aggregated_data
-                    WHERE site_id = $1
-                      AND device_id = $2
-                      AND datapoint = ANY($3)
-                      AND timestamp >= $4
-                      AND timestamp < $5
+                    {source}
                     ORDER BY timestamp
                 """
                 return await self.fetch(
                     query, self.site_id, device_id, datapoints, start_time, end_time
                 )
+
+            query = f"""
+                WITH source AS ({source})
+                SELECT * FROM source
+                WHERE datapoint = $6
+                   OR timestamp NOT IN (
+                       SELECT timestamp FROM source WHERE datapoint = $6 AND value < $7
+                   )
+                ORDER BY timestamp
+            """
+            return await self.fetch(
+                query, self.site_id, device_id, datapoints, start_time, end_time,
+                *min_filter,
+            )
         except Exception as e:
             logger.error(f"TimescaleDB timeseries query error for site {self.site_id}: {e}")
             return []
 
+    async def query_timeseries_devices(
+        self,
+        device_ids: List[str],
+        datapoints: List[str],
+        start_time: datetime,
+        end_time: datetime,
+        resample: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Query timeseries data for several devices in one round trip.
+
+        Same rows as query_timeseries for each device, ordered by
+        (device_id, timestamp).
+
+        Returns empty list if not connected or query fails.
+        """
+        if not self.is_connected:
+            return []
+
+        try:
+            query = f"""
+                {self._timeseries_source(resample, device_filter="device_id = ANY($2)")}
+                ORDER BY device_id, timestamp
+            """
+            return await self.fetch(
+                query, self.site_id, device_ids, datapoints, start_time, end_time
+            )
+        except Exception as e:
+            logger.error(f"TimescaleDB batch timeseries query error for site {self.site_id}: {e}")
+            return []
+
+    def _timeseries_source(
+        self,
+        resample: Optional[str],
+        device_filter: str = "device_id = $2",
+    ) -> str:
+        """SELECT of (timestamp, device_id, datapoint, value) rows for a query.
+
+        Parameters are $1 site_id, $2 device_id (or device_ids array with
+        device_filter="device_id = ANY($2)"), $3 datapoints array,
+        $4 start_time, $5 end_time. Resampled rows come from a continuous
+        aggregate when one exists for the interval, otherwise from
+        time_bucket over aggregated_data.
+        """
+        cagg = CONTINUOUS_AGGREGATES.get(resample) if resample else None
+        if cagg and cagg[0] in self._continuous_aggregates:
+            # Serve whole buckets inside [start, end) from the continuous
+            # aggregate. The partial edge buckets are averaged from raw rows
+            # within the range, exactly as the time_bucket path below does;
+            # the view's full-bucket averages would include rows outside it.
+            view, interval = cagg
+            bucket = f"INTERVAL '{interval}'"
+            first_full = (
+                f"CASE WHEN time_bucket({bucket}, $4::timestamptz) = $4::timestamptz "
+                f"THEN $4::timestamptz "
+                f"ELSE time_bucket({bucket}, $4::timestamptz) + {bucket} END"
+            )
+            last_partial = f"time_bucket({bucket}, $5::timestamptz)"
+            return f"""
+                SELECT bucket as timestamp, device_id, datapoint, value
+                FROM {view}
+                WHERE site_id = $1
+                  AND {device_filter}
+                  AND datapoint = ANY($3)
+                  AND bucket >= {first_full}
+                  AND bucket < {last_partial}
+                UNION ALL
+                SELECT
+                    time_bucket({bucket}, timestamp) as timestamp,
+                    device_id,
+                    datapoint,
+                    AVG(value) as value
+                FROM aggregated_data
+                WHERE site_id = $1
+                  AND {device_filter}
+                  AND datapoint = ANY($3)
+                  AND timestamp >= $4
+                  AND timestamp < $5
+                  AND (timestamp < {first_full} OR timestamp >= {last_partial})
+                GROUP BY 1, 2, 3
+            """
+        elif resample:
+            # Use time_bucket for resampling
+            # Note: interval is embedded in SQL (safe - values come from resample_map)
+            return f"""
+                SELECT
+                    time_bucket(INTERVAL '{resample}', timestamp) as timestamp,
+                    device_id,
+                    datapoint,
+                    AVG(value) as value
+                FROM aggregated_data
+                WHERE site_id = $1
+                  AND {device_filter}
+                  AND datapoint = ANY($3)
+                  AND timestamp >= $4
+                  AND timestamp < $5
+                GROUP BY 1, 2, 3
+            """
+        else:
+            return f"""
+                SELECT timestamp, device_id, datapoint, value
+                FROM aggregated_data
+                WHERE site_id = $1
+                  AND {device_filter}
+                  AND datapoint = ANY($3)
+                  AND timestamp >= $4
+                  AND timestamp < $5
+            """
+
+    async def query_aggregate(
+        self,
+        device_id: str,
+        datapoint: str,
+        start_time: datetime,
+        end_time: datetime,
+        group_by: str,
+        aggregation: str = "avg",
+        resample: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Aggregate one datapoint per calendar group on the server.
+
+        Values are (optionally) resampled first, exactly as query_timeseries
+        would return them, then grouped in UTC and reduced with the
+        aggregate function. Only one row per group crosses the wire.
+
+        Args:
+            device_id: Device identifier
+            datapoint: Datapoint name
+            start_time: Query start time
+            end_time: Query end time
+            group_by: Key of AGGREGATE_GROUPS
+            aggregation: Key of AGGREGATE_FUNCTIONS (unknown -> avg)
+            resample: Optional resample interval applied before grouping
+
+        Returns:
+            Rows with the group's key columns and "value", ordered by group.
+            Empty list if not connected or query fails.
+        """
+        if not self.is_connected:
+            return []
+
+        group_columns = AGGREGATE_GROUPS[group_by]
+        agg_func = AGGREGATE_FUNCTIONS.get(aggregation, AGGREGATE_FUNCTIONS["avg"])
+        positions = ", ".join(str(i) for i in range(1, len(group_columns) + 1))
+
+        try:
+            # Group key expressions and the function come from the constant
+            # maps above, never from user input
+            query = f"""
+                SELECT {", ".join(group_columns)}, {agg_func}(value) AS value
+                FROM ({self._timeseries_source(resample)}) AS source
+                WHERE value IS NOT NULL
+                GROUP BY {positions}
+                ORDER BY {positions}
+            """
+            return await self.fetch(
+                query, self.site_id, device_id, [datapoint], start_time, end_time
+            )
+        except Exception as e:
+            logger.error(f"TimescaleDB aggregate query error for site {self.site_id}: {e}")
+            return []
+
     async def query_latest(self, max_age_minutes: int = 60) -> List[Dict[str, Any]]:
         """Query latest values for all devices at this site from aggregated_data.
 
         This is a fallback when Supabase latest_data is not available.
         Uses the most recent timestamp from aggregated_data table.
 
+        Results are cached for LATEST_CACHE_TTL seconds since many dashboard
+        widgets request the same snapshot.
+
         Args:
             max_age_minutes: Only look at data from the last N minutes (default 60)
 
@@ -214,7 +538,11 @@ class TimescaleConnection:
                   AND timestamp >= NOW() - INTERVAL '%s minutes'
                 ORDER BY device_id, datapoint, timestamp DESC
             """ % max_age_minutes
-            return await self.fetch(query, self.site_id)
+            return await self._cached_fetch(
+                ("latest", max_age_minutes),
+                LATEST_CACHE_TTL,
+                lambda: self.fetch(query, self.site_id),
+            )
         except Exception as e:
             logger.error(f"TimescaleDB query_latest error for site {self.site_id}: {e}")
             return []
@@ -224,47 +552,69 @@ class TimescaleConnection:
         start_date: datetime,
         end_date: datetime,
         device_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
     ) -> List[Dict[str, Any]]:
         """Query daily energy data from daily_energy_data table.
 
+        The end date is inclusive: rows are matched with
+        timestamp < end_date + 1 day, a half-open range that lets Timescale
+        exclude chunks on exact boundaries.
+
+        Results are cached for DAILY_ENERGY_CACHE_TTL seconds per
+        (start_date, end_date, device_id, limit, offset).
+
         Args:
             start_date: Start date for query
-            end_date: End date for query
+            end_date: End date for query (inclusive)
             device_id: Optional device filter
+            limit: Maximum number of rows to return (None = all rows)
+            offset: Number of rows to skip (for pagination)
 
         Returns empty list if not connected or query fails.
         """
         if not self.is_connected:
             return []
 
+        # Computed here rather than as "$n + INTERVAL '1 day'", which would
+        # make Postgres infer the parameter as an interval
+        end_exclusive = end_date + timedelta(days=1)
+
         try:
             if device_id:
-                query = """
-                    SELECT timestamp, device_id, datapoint, value
-                    FROM daily_energy_data
-                    WHERE site_id = $1
-                      AND device_id = $2
-                      AND timestamp >= $3
-                      AND timestamp <= $4
-                    ORDER BY timestamp
-                """
-                return await self.fetch(query, self.site_id, device_id, start_date, end_date)
+                filters = "AND device_id = $2 AND timestamp >= $3 AND timestamp < $4"
+                order = "timestamp, datapoint"
+                args = [self.site_id, device_id, start_date, end_exclusive]
             else:
-                query = """
-                    SELECT timestamp, device_id, datapoint, value
-                    FROM daily_energy_data
-                    WHERE site_id = $1
-                      AND timestamp >= $2
-                      AND timestamp <= $3
-                    ORDER BY timestamp, device_id
-                """
-                return await self.fetch(query, self.site_id, start_date, end_date)
+                filters = "AND timestamp >= $2 AND timestamp < $3"
+                order = "timestamp, device_id, datapoint"
+                args = [self.site_id, start_date, end_exclusive]
+
+            page = ""
+            if limit is not None:
+                args.append(limit)
+                page += f" LIMIT ${len(args)}"
+            if offset:
+                args.append(offset)
+                page += f" OFFSET ${len(args)}"
+
+            query = f"""
+                SELECT timestamp, device_id, datapoint, value
+                FROM daily_energy_data
+                WHERE site_id = $1
+                  {filters}
+                ORDER BY {order}{page}
+            """
+            return await self._cached_fetch(
+                ("daily_energy", start_date, end_date, device_id, limit, offset),
+                DAILY_ENERGY_CACHE_TTL,
+                lambda: self.fetch(query, *args),
+            )
         except Exception as e:
             logger.error(f"TimescaleDB daily_energy_data query error for site {self.site_id}: {e}")
             return []
 
 
-
 class TimescaleConnectionManager:
     """Manages TimescaleDB connections for multiple sites.
 
@@ -273,10 +623,25 @@ class TimescaleConnectionManager:
 
     def __init__(self):
         self._connections: Dict[str, TimescaleConnection] = {}
+        self._connect_locks: Dict[str, asyncio.Lock] = {}
 
     async def get_connection(self, site_id: str) -> TimescaleConnection:
-        """Get or create a TimescaleDB connection for a site."""
-        if site_id not in self._connections:
+        """Get or create a TimescaleDB connection for a site.
+
+        The cached path is lock-free; only the first connect for a site is
+        serialized so concurrent callers don't each create a pool.
+        """
+        conn = self._connections.get(site_id)
+        if conn is not None:
+            return conn
+
+        lock = self._connect_locks.setdefault(site_id, asyncio.Lock())
+        async with lock:
+            # Another coroutine may have connected while we waited
+            conn = self._connections.get(site_id)
+            if conn is not None:
+                return conn
+
             config = get_site_timescale_config(site_id)
 
             if config and config.is_configured:
@@ -289,7 +654,7 @@ class TimescaleConnectionManager:
 
             self._connections[site_id] = conn
 
-        return self._connections[site_id]
+        return conn
 
     async def close_all(self) -> None:
         """Close all connections."""
@@ -4,15 +4,56 @@ This module provides a singleton Anthropic client with tool calling support
 for generating charts from natural language prompts.
 """
 
+import asyncio
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
 
 import anthropic
+import httpx
+import orjson
 
 from app.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Beta header enabling cache_control breakpoints on system/tools
+PROMPT_CACHING_BETA = "prompt-caching-2024-07-31"
+
+# Shared connection pool for Anthropic requests. HTTP/2 multiplexes the
+# per-iteration tool-loop calls of concurrent conversations over a few
+# TLS sessions instead of opening a connection per request. Timeouts stay at
+# the SDK default: long non-streaming completions can take minutes.
+HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+
+# Ephemeral cache entries expire after 5 minutes without a hit; refresh
+# shortly before that so idle periods don't cost a full prefix rewrite.
+CACHE_KEEPALIVE_INTERVAL = 240  # seconds
+
+# Latency modes map onto Anthropic service tiers: "optimized" lets requests
+# use priority capacity when the org has it, "standard" pins the standard
+# tier for batch/backfill work where turn latency doesn't matter.
+LatencyMode = Literal["standard", "optimized"]
+_SERVICE_TIERS: Dict[str, str] = {
+    "standard": "standard_only",
+    "optimized": "auto",
+}
+
+# Tool results may carry numpy arrays and naive UTC datetimes from the DB layer
+_TOOL_RESULT_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+
+
+def _serialize_tool_result(result: Any) -> str:
+    """Serialize a tool result to compact JSON for a tool_result block.
+
+    Tool results are the bulk of the growing message history, so encoding
+    them here with orjson (numpy arrays included) leaves the SDK's stdlib
+    JSON encoder only opaque strings to copy on each request.
+
+    Falls back to str() for values orjson cannot encode natively
+    (e.g. Decimal from asyncpg numeric columns).
+    """
+    return orjson.dumps(result, default=str, option=_TOOL_RESULT_JSON_OPTIONS).decode()
+
 
 class AnthropicClient:
     """Wrapper for Anthropic Claude API with tool calling support."""
@@ -23,6 +64,7 @@ class AnthropicClient:
     def __init__(self):
         self._client: Optional[anthropic.Anthropic] = None
         self._async_client: Optional[anthropic.AsyncAnthropic] = None
+        self._keepalive_task: Optional[asyncio.Task] = None
 
     @property
     def client(self) -> anthropic.Anthropic:
@@ -41,7 +83,13 @@ class AnthropicClient:
             if not settings.ANTHROPIC_API_KEY:
                 raise ValueError("ANTHROPIC_API_KEY not configured")
             self._async_client = anthropic.AsyncAnthropic(
-                api_key=settings.ANTHROPIC_API_KEY
+                api_key=settings.ANTHROPIC_API_KEY,
+                default_headers={"anthropic-beta": PROMPT_CACHING_BETA},
+                http_client=httpx.AsyncClient(
+                    http2=True,
+                    limits=HTTP_LIMITS,
+                    timeout=anthropic.DEFAULT_TIMEOUT,
+                ),
             )
             logger.info("Initialized async Anthropic client")
         return self._async_client
@@ -57,49 +105,128 @@ class AnthropicClient:
     async def chat(
         self,
         messages: List[Dict[str, Any]],
-        system: Optional[str] = None,
+        system: Optional[Union[str, List[Dict[str, Any]]]] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
         model: Optional[str] = None,
         max_tokens: int = 16384,
         temperature: float = 0.0,
+        latency_mode: LatencyMode = "standard",
     ) -> anthropic.types.Message:
         """Send a chat message with optional tools.
 
         Args:
             messages: List of message dicts with role and content
-            system: System prompt
+            system: System prompt string or content blocks
             tools: List of tool definitions
             model: Model to use (defaults to claude-sonnet-4)
             max_tokens: Maximum tokens in response
             temperature: Sampling temperature (0.0 for deterministic)
+            latency_mode: "optimized" for interactive calls, "standard" otherwise
 
         Returns:
             Anthropic Message response
         """
+        kwargs = self._build_request(
+            messages, system, tools, model, max_tokens, temperature, latency_mode
+        )
+        response = await self.async_client.messages.create(**kwargs)
+        return response
+
+    def _build_request(
+        self,
+        messages: List[Dict[str, Any]],
+        system: Optional[Union[str, List[Dict[str, Any]]]],
+        tools: Optional[List[Dict[str, Any]]],
+        model: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        latency_mode: LatencyMode = "standard",
+    ) -> Dict[str, Any]:
+        """Build keyword arguments for a messages API call."""
         kwargs: Dict[str, Any] = {
             "model": model or self.DEFAULT_MODEL,
             "max_tokens": max_tokens,
             "messages": messages,
             "temperature": temperature,
+            # Sent via extra_body so older SDK versions without the
+            # service_tier parameter still pass it through
+            "extra_body": {"service_tier": _SERVICE_TIERS[latency_mode]},
         }
 
-        if system:
-            kwargs["system"] = system
+        # The system prompt and tool schemas are identical across every
+        # iteration of the tool loop, so mark them as a cacheable prefix.
+        # Block lists (from get_system_prompt) carry their own breakpoints.
+        if isinstance(system, str):
+            kwargs["system"] = [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ]
+        elif system:
+            kwargs["system"] = list(system)
 
-        if tools:
+        if tools and "cache_control" in tools[-1]:
+            # Registry lists come with the cache breakpoint already set
             kwargs["tools"] = tools
+        elif tools:
+            # Copy the last tool rather than mutating the shared definition
+            kwargs["tools"] = [
+                *tools[:-1],
+                {**tools[-1], "cache_control": {"type": "ephemeral"}},
+            ]
 
-        response = await self.async_client.messages.create(**kwargs)
-        return response
+        return kwargs
+
+    async def _stream_with_tool_dispatch(
+        self,
+        messages: List[Dict[str, Any]],
+        system: Union[str, List[Dict[str, Any]]],
+        tools: List[Dict[str, Any]],
+        tool_executor: callable,
+        model: Optional[str] = None,
+        max_tokens: int = 16384,
+        temperature: float = 0.0,
+        latency_mode: LatencyMode = "standard",
+    ) -> Tuple[anthropic.types.Message, Dict[str, asyncio.Task]]:
+        """Stream a response, starting each tool call as soon as its block closes.
+
+        Tool execution overlaps with the rest of the model's generation
+        instead of waiting for the full response.
+
+        Returns:
+            Tuple of (final message, {tool_use_id: running task})
+        """
+        kwargs = self._build_request(
+            messages, system, tools, model, max_tokens, temperature, latency_mode
+        )
+        tool_tasks: Dict[str, asyncio.Task] = {}
+
+        try:
+            async with self.async_client.messages.stream(**kwargs) as stream:
+                async for event in stream:
+                    if event.type != "content_block_stop":
+                        continue
+                    block = stream.current_message_snapshot.content[event.index]
+                    if block.type == "tool_use":
+                        logger.info(f"[LLM] Dispatching tool early: {block.name}")
+                        tool_tasks[block.id] = asyncio.create_task(
+                            tool_executor(block.name, block.input)
+                        )
+                response = await stream.get_final_message()
+        except BaseException:
+            for task in tool_tasks.values():
+                task.cancel()
+            raise
+
+        return response, tool_tasks
 
     async def chat_with_tools(
         self,
         messages: List[Dict[str, Any]],
-        system: str,
+        system: Union[str, List[Dict[str, Any]]],
         tools: List[Dict[str, Any]],
         tool_executor: callable,
         max_iterations: int = 10,
         model: Optional[str] = None,
+        latency_mode: LatencyMode = "optimized",
     ) -> Dict[str, Any]:
         """Run a multi-turn conversation with tool execution.
 
@@ -111,11 +238,12 @@ class AnthropicClient:
 
         Args:
             messages: Initial messages
-            system: System prompt
+            system: System prompt string or content blocks
             tools: Tool definitions
             tool_executor: Async function(tool_name, tool_input) -> result
             max_iterations: Maximum tool calling iterations
             model: Model to use
+            latency_mode: "optimized" (default, interactive) or "standard"
 
         Returns:
             Dict with final_message, tool_calls, and all_messages
@@ -133,94 +261,97 @@ class AnthropicClient:
             iteration += 1
             logger.info(f"[LLM] Iteration {iteration}/{max_iterations}")
 
-            response = await self.chat(
+            response, tool_tasks = await self._stream_with_tool_dispatch(
                 messages=current_messages,
                 system=system,
                 tools=tools,
+                tool_executor=tool_executor,
                 model=model,
+                latency_mode=latency_mode,
             )
 
             logger.info(f"[LLM] Response stop_reason: {response.stop_reason}")
             logger.info(f"[LLM] Response content blocks: {len(response.content)}")
 
-            # Check if response has tool use
-            tool_use_blocks = [
-                block for block in response.content if block.type == "tool_use"
-            ]
+            # Classify content blocks in a single pass
+            assistant_content = []
+            tool_use_blocks = []
+            text_parts = []
+            append_content = assistant_content.append
+
+            for block in response.content:
+                block_type = block.type
+                if block_type == "tool_use":
+                    tool_use_blocks.append(block)
+                    append_content(
+                        {
+                            "type": "tool_use",
+                            "id": block.id,
+                            "name": block.name,
+                            "input": block.input,
+                        }
+                    )
+                elif block_type == "text":
+                    text_parts.append(block.text)
+                    append_content({"type": "text", "text": block.text})
 
             logger.info(f"[LLM] Tool use blocks: {len(tool_use_blocks)}")
 
             if not tool_use_blocks:
-                # No more tool calls, extract final text
-                text_blocks = [
-                    block.text for block in response.content if block.type == "text"
-                ]
-                final_message = "\n".join(text_blocks) if text_blocks else ""
-
+                # No more tool calls, return final text
                 return {
-                    "final_message": final_message,
+                    "final_message": "\n".join(text_parts),
                     "tool_calls": tool_calls,
                     "all_messages": current_messages,
                     "stop_reason": response.stop_reason,
                 }
 
-            # Process tool calls
-            assistant_content = []
             tool_results = []
 
-            for tool_block in response.content:
-                if tool_block.type == "text":
-                    assistant_content.append(
-                        {"type": "text", "text": tool_block.text}
+            # Tool calls are independent, so wait on all of them together
+            results = await asyncio.gather(
+                *[tool_tasks[block.id] for block in tool_use_blocks],
+                return_exceptions=True,
+            )
+
+            for tool_block, result in zip(tool_use_blocks, results):
+                # BaseException: a cancelled tool task comes back as CancelledError
+                if isinstance(result, BaseException):
+                    # CancelledError has an empty message; fall back to its type
+                    error = str(result) or type(result).__name__
+                    logger.error(f"Tool execution failed: {tool_block.name}: {error}")
+                    tool_calls.append(
+                        {
+                            "tool": tool_block.name,
+                            "input": tool_block.input,
+                            "error": error,
+                            "success": False,
+                        }
                     )
-                elif tool_block.type == "tool_use":
-                    assistant_content.append(
+                    tool_results.append(
                         {
-                            "type": "tool_use",
-                            "id": tool_block.id,
-                            "name": tool_block.name,
+                            "type": "tool_result",
+                            "tool_use_id": tool_block.id,
+                            "content": _serialize_tool_result({"error": error}),
+                            "is_error": True,
+                        }
+                    )
+                else:
+                    tool_calls.append(
+                        {
+                            "tool": tool_block.name,
                             "input": tool_block.input,
+                            "result": result,
+                            "success": True,
+                        }
+                    )
+                    tool_results.append(
+                        {
+                            "type": "tool_result",
+                            "tool_use_id": tool_block.id,
+                            "content": _serialize_tool_result(result),
                         }
                     )
-
-                    # Execute tool
-                    try:
-                        result = await tool_executor(
-                            tool_block.name, tool_block.input
-                        )
-                        tool_calls.append(
-                            {
-                                "tool": tool_block.name,
-                                "input": tool_block.input,
-                                "result": result,
-                                "success": True,
-                            }
-                        )
-                        tool_results.append(
-                            {
-                                "type": "tool_result",
-                                "tool_use_id": tool_block.id,
-                                "content": str(result),
-                            }
-                        )
-                    except Exception as e:
-                        logger.error(f"Tool execution failed: {tool_block.name}: {e}")
-                        tool_calls.append(
-                            {
-                                "tool": tool_block.name,
-                                "input": tool_block.input,
-                                "error": str(e),
-                                "success": False,
-                            }
-                        )
-                        tool_results.append(
-                            {
-                                "type": "tool_result",
-                                "tool_use_id": tool_block.id,
-                                "content": f"Error: {e}",
-                                "is_error": True,
-                            }
-                        )
 
             # Add assistant message and tool results
             current_messages.append({"role": "assistant", "content": assistant_content})
@@ -235,6 +366,60 @@ class AnthropicClient:
             "stop_reason": "max_iterations",
         }
 
+    async def _refresh_cache(
+        self,
+        system: Union[str, List[Dict[str, Any]]],
+        tools: List[Dict[str, Any]],
+        model: Optional[str] = None,
+    ) -> None:
+        """Send a 1-token request that re-reads the cached system/tools prefix."""
+        kwargs = self._build_request(
+            [{"role": "user", "content": "ping"}], system, tools, model, 1, 0.0
+        )
+        await self.async_client.messages.create(**kwargs)
+
+    def start_cache_keepalive(
+        self,
+        system: Union[str, List[Dict[str, Any]]],
+        tools: List[Dict[str, Any]],
+        interval: float = CACHE_KEEPALIVE_INTERVAL,
+        model: Optional[str] = None,
+    ) -> None:
+        """Periodically refresh the prompt cache so it survives idle periods.
+
+        Args:
+            system: System prompt (must match what chat_with_tools sends)
+            tools: Tool definitions (must match what chat_with_tools sends)
+            interval: Seconds between refreshes
+            model: Model to use
+        """
+        if self._keepalive_task is not None and not self._keepalive_task.done():
+            return
+
+        async def _loop() -> None:
+            while True:
+                try:
+                    await self._refresh_cache(system, tools, model)
+                    logger.debug("[LLM] Prompt cache refreshed")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"[LLM] Prompt cache refresh failed: {e}")
+                await asyncio.sleep(interval)
+
+        self._keepalive_task = asyncio.create_task(_loop())
+        logger.info(f"[LLM] Prompt cache keep-alive started (every {interval}s)")
+
+    async def stop_cache_keepalive(self) -> None:
+        """Cancel the prompt cache keep-alive task if running."""
+        task, self._keepalive_task = self._keepalive_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
 
 # Global singleton
 _client: Optional[AnthropicClient] = None
@@ -4,12 +4,17 @@ These prompts provide domain context and instructions for Claude
 when generating charts and analyzing HVAC data.
 """
 
-from typing import Optional
+from functools import lru_cache
+from itertools import product
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 
-HVAC_ANALYTICS_SYSTEM_PROMPT = """You are an expert HVAC data analyst assistant for the Alto Central building management system. Your role is to help users visualize and understand their HVAC system data.
+# Prompt sections. Chart- and data-specific sections are dropped when the
+# matching tools are not offered, so a data-only session doesn't pay for
+# chart guidance tokens.
+_INTRO = """You are an expert HVAC data analyst assistant for the Alto Central building management system. Your role is to help users visualize and understand their HVAC system data."""
 
-## PREFERRED TOOL: query_and_chart
+_PREFERRED_TOOL = """## PREFERRED TOOL: query_and_chart
 Use the `query_and_chart` tool for MOST requests. It handles everything in ONE call:
 - Queries data from multiple devices
 - Calculates efficiency automatically if needed
@@ -27,15 +32,18 @@ query_and_chart(
 )
 ```
 
-Only use separate query_timeseries + create_*_chart for complex custom charts.
+Only use separate query_timeseries + create_*_chart for complex custom charts."""
 
-## Your Capabilities
-1. Query historical timeseries data from the building's sensors
-2. Create interactive charts (line, scatter, bar) using Plotly
-3. Analyze patterns in power consumption, efficiency, and temperatures
-4. Save useful chart configurations as reusable templates
+# Capabilities and workflow steps as (tool group, text); None = always shown.
+# Numbered lists are built from the entries whose tools are offered.
+_CAPABILITIES: List[Tuple[Optional[str], str]] = [
+    ("data", "Query historical timeseries data from the building's sensors"),
+    ("chart", "Create interactive charts (line, scatter, bar) using Plotly"),
+    (None, "Analyze patterns in power consumption, efficiency, and temperatures"),
+    ("template", "Save useful chart configurations as reusable templates"),
+]
 
-## Available Data
+_DATA_MODEL = """## Available Data
 The building has these main components you can query:
 
 **Plant Level (device_id: "plant")**
@@ -66,9 +74,9 @@ The building has these main components you can query:
 **Weather (device_id: "outdoor_weather_station")**
 - drybulb_temperature: Outdoor Dry Bulb (°F)
 - wetbulb_temperature: Outdoor Wet Bulb (°F)
-- humidity: Relative Humidity (%)
+- humidity: Relative Humidity (%)"""
 
-## Chart Guidelines
+_CHART_GUIDELINES = """## Chart Guidelines
 
 1. **Line Charts**: Use for trends over time
    - Power consumption patterns
@@ -169,55 +177,159 @@ label_by options:
 ### Manual Approach (only if labeled_scatter_chart doesn't fit)
 For other labeling criteria (wetbulb temp, custom grouping), use:
 1. `batch_query_timeseries` to fetch data from multiple devices
-2. `create_multi_trace_scatter` with manually grouped traces
-
-## Workflow
-1. First, query the relevant data using data tools
-2. Then, create a chart using the appropriate chart tool
-3. If the user wants to save the chart pattern, use save_chart_template
+2. `create_multi_trace_scatter` with manually grouped traces"""
+
+_WORKFLOW: List[Tuple[Optional[str], str]] = [
+    ("data", "First, query the relevant data using data tools"),
+    ("chart", "Then, create a chart using the appropriate chart tool"),
+    ("template", "If the user wants to save the chart pattern, use save_chart_template"),
+]
+
+# Chart step when data tools are not offered (chart tools query data themselves)
+_WORKFLOW_CHART_ONLY: Tuple[Optional[str], str] = (
+    "chart",
+    "Create the chart with query_and_chart, which queries the data itself",
+)
 
-## Response Style
+_RESPONSE_STYLE = """## Response Style
 - Be concise but informative
 - Explain what the chart shows
 - Point out notable patterns or anomalies
-- Suggest related analyses if relevant
+- Suggest related analyses if relevant"""
 
-## Data Quality & Outlier Filtering
+_DATA_QUALITY = """## Data Quality & Outlier Filtering
 - ALWAYS use filter_outliers=true (default) when querying data to remove sensor errors
 - For efficiency charts, use min_load=50 to filter low-load noise (unreliable efficiency at low loads)
 - The system automatically applies:
   - IQR-based statistical filtering (removes outliers beyond 1.5*IQR)
   - HVAC-specific bounds (e.g., efficiency 0.3-3.0 kW/RT, temperatures 30-100°F)
-- Check filter_stats in response to see how many outliers were removed
+- Check filter_stats in response to see how many outliers were removed"""
 
-## Important Notes
+_NOTES = """## Important Notes
 - Efficiency (kW/RT) should typically be between 0.5-1.5 for water-cooled chillers
 - Use appropriate time resolutions: 1m for hours, 15m for days, 1h for weeks
 - Always label axes with units"""
 
 
+def _numbered_section(
+    title: str,
+    items: List[Tuple[Optional[str], str]],
+    groups: Set[str],
+) -> Optional[str]:
+    """Numbered section of the items whose tool group is offered."""
+    lines = [text for group, text in items if group is None or group in groups]
+    if not lines:
+        return None
+    numbered = "\n".join(f"{i}. {text}" for i, text in enumerate(lines, 1))
+    return f"## {title}\n{numbered}"
+
+
+def _assemble_prompt(include_data: bool, include_chart: bool, include_template: bool) -> str:
+    """Join the prompt sections relevant to the offered tools.
+
+    The data catalog and data-quality guidance are kept whenever chart tools
+    are offered, since query_and_chart and labeled_scatter_chart query data
+    themselves.
+    """
+    groups = {
+        group
+        for group, offered in (
+            ("data", include_data),
+            ("chart", include_chart),
+            ("template", include_template),
+        )
+        if offered
+    }
+    needs_data = include_data or include_chart
+
+    sections: List[Optional[str]] = [_INTRO]
+    if include_chart:
+        sections.append(_PREFERRED_TOOL)
+    sections.append(_numbered_section("Your Capabilities", _CAPABILITIES, groups))
+    if needs_data:
+        sections.append(_DATA_MODEL)
+    if include_chart:
+        sections.append(_CHART_GUIDELINES)
+    workflow = _WORKFLOW if include_data else [
+        _WORKFLOW_CHART_ONLY if group == "chart" else (group, text)
+        for group, text in _WORKFLOW
+    ]
+    sections += [_numbered_section("Workflow", workflow, groups), _RESPONSE_STYLE]
+    if needs_data:
+        sections.append(_DATA_QUALITY)
+    sections.append(_NOTES)
+    return "\n\n".join(section for section in sections if section)
+
+
+# Assembled prompt for every (include_data, include_chart, include_template)
+# combination, keyed like get_tool_definitions. Each variant is a stable
+# cache prefix of its own.
+_PROMPTS: Dict[Tuple[bool, bool, bool], str] = {
+    key: _assemble_prompt(*key) for key in product((True, False), repeat=3)
+}
+
+HVAC_ANALYTICS_SYSTEM_PROMPT = _PROMPTS[(True, True, True)]
+
+
+# Cached prefix blocks, one per tool combination, shared by every site
+_BASE_PROMPT_BLOCKS: Dict[Tuple[bool, bool, bool], Dict[str, Any]] = {
+    key: {"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}
+    for key, prompt in _PROMPTS.items()
+}
+
+# Per-site context block. The site name is kept out of the base prompt so
+# its text (and the cached prefix) is identical for every site.
+SITE_CONTEXT_TEMPLATE = "## Site\nYou are analyzing data for the {site_name} site."
+
+
+@lru_cache(maxsize=256)
+def _site_prompt_blocks(
+    site_name: Optional[str],
+    tools_key: Tuple[bool, bool, bool],
+) -> List[Dict[str, Any]]:
+    """Build the system prompt blocks for a site (memoized per site)."""
+    blocks: List[Dict[str, Any]] = [_BASE_PROMPT_BLOCKS[tools_key]]
+    if site_name:
+        blocks.append(
+            {"type": "text", "text": SITE_CONTEXT_TEMPLATE.format(site_name=site_name)}
+        )
+    return blocks
+
+
 def get_system_prompt(
     site_name: Optional[str] = None,
     additional_context: Optional[str] = None,
-) -> str:
-    """Get the system prompt with optional customization.
+    include_data: bool = True,
+    include_chart: bool = True,
+    include_template: bool = True,
+) -> List[Dict[str, Any]]:
+    """Get the system prompt as Anthropic content blocks.
+
+    The static base prompt is the first block and carries a cache_control
+    breakpoint, so it stays a byte-identical cache prefix for every site.
+    Site name and additional context go in a trailing, uncached block.
+
+    The per-site blocks are memoized on site_name only; additional_context
+    is free-form and is appended outside the cache. Callers must treat the
+    returned blocks as read-only.
 
     Args:
         site_name: Name of the site for context
         additional_context: Additional context to append
+        include_data: Include data tool sections (match get_tool_definitions)
+        include_chart: Include chart tool sections (match get_tool_definitions)
+        include_template: Include template tool sections
 
     Returns:
-        Complete system prompt
+        List of system prompt content blocks
     """
-    prompt = HVAC_ANALYTICS_SYSTEM_PROMPT
-
-    if site_name:
-        prompt = prompt.replace(
-            "for the Alto Central building management system",
-            f"for the {site_name} building management system",
-        )
-
-    if additional_context:
-        prompt = f"{prompt}\n\n## Additional Context\n{additional_context}"
-
-    return prompt
+    blocks = _site_prompt_blocks(
+        site_name, (bool(include_data), bool(include_chart), bool(include_template))
+    )
+    if not additional_context:
+        return blocks
+
+    context = f"## Additional Context\n{additional_context}"
+    if len(blocks) > 1:
+        context = f"{blocks[1]['text']}\n\n{context}"
+    return [blocks[0], {"type": "text", "text": context}]
@@ -4,13 +4,130 @@ These tools allow Claude to generate Plotly chart specifications
 from data that has been queried via data tools.
 """
 
+import asyncio
+import copy
 import logging
-from typing import Any, Dict, List, Optional
-
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache, partial
+from itertools import compress
+from statistics import fmean
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from app.analytics.charts.downsample import m4_indices, minmax_lttb_indices
 from app.analytics.charts.plotly_builder import PlotlyBuilder
+from app.config import get_site_by_id
+from app.llm.tools.data_tools import (
+    _format_utc_offset,
+    execute_batch_query_timeseries,
+    execute_query_timeseries,
+)
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on points per chart trace; larger series are downsampled
+# (M4 for lines, MinMaxLTTB for scatter) to roughly screen resolution.
+MAX_CHART_POINTS = 2000
+
+
+# Default trace colors (Plotly/D3 category10), cycled per trace
+TRACE_COLORS: Tuple[str, ...] = (
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf",
+)
+
+
+def _as_float_array(values: List[Any]) -> np.ndarray:
+    """Convert a list of numbers (None allowed) to a float array."""
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _compact_floats(values: List[Any], digits: int = 6) -> List[Any]:
+    """Round floats to `digits` significant digits for a smaller payload.
+
+    Plotly.js plots in single precision, so 17-digit doubles only inflate
+    the JSON. Each float is rounded on its decimal scale, so the result
+    serializes with its short form (e.g. 412.387, not 412.38699999999994).
+    Only the fractional part is ever rounded: floats of `digits` or more
+    integer digits (e.g. epoch milliseconds) are kept as is, as are ints.
+    None and NaN become None. Lists with any non-number (timestamps,
+    category strings like "2024", bools) are returned as is, so their axis
+    type is kept.
+    """
+    if not all(
+        v is None or (isinstance(v, (int, float)) and not isinstance(v, bool))
+        for v in values
+    ):
+        return values
+    is_float = np.fromiter(
+        (isinstance(v, float) for v in values), dtype=bool, count=len(values)
+    )
+    if not is_float.any():
+        return values
+    a = _as_float_array(values)
+
+    nonzero = np.isfinite(a) & (a != 0)
+    exponent = np.zeros_like(a)
+    exponent[nonzero] = np.floor(np.log10(np.abs(a[nonzero])))
+    shift = digits - 1 - exponent
+
+    # Multiply/divide by exact powers of ten so rounding lands on the
+    # nearest double to the decimal value
+    out = a.copy()
+    rounded = is_float & nonzero & (shift > 0)
+    scale = 10.0 ** shift[rounded]
+    out[rounded] = np.round(a[rounded] * scale) / scale
+
+    # Ints (and None) pass through untouched; NaN floats -> None
+    return [
+        (None if r != r else r) if f else v
+        for v, r, f in zip(values, out.tolist(), is_float.tolist())
+    ]
+
+
+def _downsample_line_records(
+    data: List[Dict[str, Any]],
+    y_fields: List[str],
+    max_points: int,
+) -> List[Dict[str, Any]]:
+    """Reduce time-ordered records with M4, keeping each series' envelope."""
+    if len(data) <= max_points or not y_fields:
+        return data
+    per_field = max(max_points // len(y_fields), 4)
+    try:
+        keep = np.unique(np.concatenate([
+            m4_indices(_as_float_array([d.get(f) for d in data]), per_field)
+            for f in y_fields
+        ]))
+    except (TypeError, ValueError):
+        return data  # Non-numeric series: leave as is
+    return [data[i] for i in keep]
+
+
+def _downsample_scatter_records(
+    data: List[Dict[str, Any]],
+    x_field: str,
+    y_field: str,
+    max_points: int,
+) -> List[Dict[str, Any]]:
+    """Reduce scatter records with MinMaxLTTB over (x, y)."""
+    if len(data) <= max_points:
+        return data
+    try:
+        keep = minmax_lttb_indices(
+            _as_float_array([d.get(x_field) for d in data]),
+            _as_float_array([d.get(y_field) for d in data]),
+            max_points,
+        )
+    except (TypeError, ValueError):
+        return data  # Non-numeric axis (e.g. timestamps): leave as is
+    return [data[i] for i in keep]
+
 
 # Combined query + chart tool (easier to use)
 QUERY_AND_CHART_TOOL = {
@@ -413,12 +530,13 @@ def execute_create_line_chart(
     x_label: str = "Time",
     y_label: str = "Value",
     series_names: Optional[List[str]] = None,
+    max_points: int = MAX_CHART_POINTS,
     **kwargs,
 ) -> Dict[str, Any]:
     """Execute line chart creation."""
     try:
         spec = PlotlyBuilder.line_chart(
-            data=data,
+            data=_downsample_line_records(data, y_fields, max_points),
             x_field=x_field,
             y_fields=y_fields,
             title=title,
@@ -446,12 +564,13 @@ def execute_create_scatter_chart(
     color_field: Optional[str] = None,
     color_label: Optional[str] = None,
     trendline: bool = False,
+    max_points: int = MAX_CHART_POINTS,
     **kwargs,
 ) -> Dict[str, Any]:
     """Execute scatter chart creation."""
     try:
         spec = PlotlyBuilder.scatter_chart(
-            data=data,
+            data=_downsample_scatter_records(data, x_field, y_field, max_points),
             x_field=x_field,
             y_field=y_field,
             title=title,
@@ -554,21 +673,16 @@ def execute_create_multi_trace_scatter(
 
     Each trace represents a labeled group with its own color.
     """
-    default_colors = [
-        "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
-        "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"
-    ]
-
     try:
         plotly_traces = []
         for i, trace in enumerate(traces):
-            color = trace.get("color") or default_colors[i % len(default_colors)]
+            color = trace.get("color") or TRACE_COLORS[i % len(TRACE_COLORS)]
             plotly_traces.append({
                 "type": "scatter",
                 "mode": "markers",
                 "name": trace["name"],
-                "x": trace["x"],
-                "y": trace["y"],
+                "x": _compact_floats(trace["x"]),
+                "y": _compact_floats(trace["y"]),
                 "marker": {
                     "size": marker_size,
                     "opacity": marker_opacity,
@@ -644,6 +758,235 @@ def execute_create_multi_axis_chart(
         return {"success": False, "error": str(e)}
 
 
+# Fleets up to this size get a full 2^M mask -> label table (256 strings)
+COMBINATION_TABLE_MAX_CHILLERS = 8
+
+
+def _format_combination_label(chiller_ids: Tuple[str, ...], mask: int) -> str:
+    """Format a running-chiller bitmask as "CH-1+CH-2" in sorted id order."""
+    order = sorted(range(len(chiller_ids)), key=chiller_ids.__getitem__)
+    return "+".join(
+        f"CH-{chiller_ids[i].split('_')[-1]}" for i in order if mask >> i & 1
+    )
+
+
+@lru_cache(maxsize=32)
+def _combination_label_table(chiller_ids: Tuple[str, ...]) -> Tuple[str, ...]:
+    """All combination labels for a chiller list, indexed by bitmask.
+
+    Built once per distinct chiller list, so label lookup is a tuple index.
+    """
+    return tuple(
+        _format_combination_label(chiller_ids, mask)
+        for mask in range(1 << len(chiller_ids))
+    )
+
+
+# status_read at or above this value means the chiller is running
+CHILLER_RUNNING_STATUS = 1.0
+
+
+def _running_masks(
+    status: np.ndarray,
+    threshold: float = CHILLER_RUNNING_STATUS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Count running chillers and pack each row's running set into a bitmask.
+
+    Bit j of a row's mask is set when column j is at or above threshold.
+    np.packbits does the packing in a single C pass over the matrix.
+
+    Args:
+        status: (rows, chillers) status matrix, at most 64 chillers; a bool
+            matrix is taken as already thresholded
+        threshold: Status value at which a chiller counts as running
+
+    Returns:
+        Tuple of (running count per row, uint64 bitmask per row)
+    """
+    n_rows, n_chillers = status.shape
+    if n_chillers > 64:
+        raise ValueError(f"At most 64 chillers supported, got {n_chillers}")
+
+    running = status if status.dtype == bool else status >= threshold
+    packed = np.packbits(running, axis=1, bitorder="little")
+    padded = np.zeros((n_rows, 8), dtype=np.uint8)
+    padded[:, :packed.shape[1]] = packed
+    return running.sum(axis=1), padded.view("<u8").ravel()
+
+
+def _group_by_chiller_label(
+    plant_data: List[Dict[str, Any]],
+    status_data: List[Dict[str, Any]],
+    chiller_ids: List[str],
+    label_by: str,
+    x_metric: str,
+    y_metric: str,
+    fixed_chiller_count: Optional[int] = None,
+) -> Dict[str, Tuple[List[Any], List[Any]]]:
+    """Join plant rows with chiller status and group x/y values by label.
+
+    The join and labelling are vectorized: chiller status is pivoted to one
+    column per chiller and aligned to the plant timestamps, so the running
+    mask, counts and combination bitmasks are whole-array operations.
+    Labels are formatted once per distinct count/combination, not per row.
+
+    Efficiency is computed from power / cooling_rate when it is one of the
+    plotted metrics and the records don't already carry it.
+
+    Args:
+        plant_data: Plant records with timestamp and metric columns
+        status_data: Chiller records with timestamp, device_id, status_read
+        chiller_ids: Chillers to consider
+        label_by: chiller_count, chiller_combination or
+            chiller_combination_fixed_count
+        x_metric: Plant column for x values
+        y_metric: Plant column for y values
+        fixed_chiller_count: Required running count for the fixed-count mode
+
+    Returns:
+        Dict of label -> (x values, y values)
+    """
+    # Extract only the columns used here, one comprehension per key. Keys
+    # absent from every record stay out of the frame, as with
+    # pd.DataFrame(plant_data).
+    wanted = ["timestamp", x_metric, y_metric]
+    if "efficiency" in (x_metric, y_metric):
+        wanted += ["power", "cooling_rate"]
+    plant_df = pd.DataFrame({
+        key: [r.get(key) for r in plant_data]
+        for key in dict.fromkeys(wanted)
+        if any(key in r for r in plant_data)
+    })
+
+    # Derive efficiency (kW/RT) only when it is plotted and not supplied
+    if (
+        "efficiency" in (x_metric, y_metric)
+        and "efficiency" not in plant_df.columns
+        and {"power", "cooling_rate"} <= set(plant_df.columns)
+    ):
+        power = pd.to_numeric(plant_df["power"], errors="coerce")
+        cooling_rate = pd.to_numeric(plant_df["cooling_rate"], errors="coerce")
+        plant_df["efficiency"] = (power / cooling_rate.where(cooling_rate > 0)).round(4)
+
+    if plant_df.empty or not {"timestamp", x_metric, y_metric} <= set(plant_df.columns):
+        return {}
+    plant_df = plant_df.dropna(subset=["timestamp", x_metric, y_metric])
+
+    # timestamp x chiller running matrix, filled by direct index assignment
+    # (missing readings stay off). Only the running/not-running bit is ever
+    # used, so it is stored as bool: 1 byte per cell instead of 8. The batch
+    # query returns at most one record per (timestamp, device).
+    plant_codes, unique_ts = pd.factorize(plant_df["timestamp"])
+    unique_chillers = pd.Index(list(dict.fromkeys(chiller_ids)))
+    rows = unique_ts.get_indexer([r.get("timestamp") for r in status_data])
+    cols = unique_chillers.get_indexer([r.get("device_id") for r in status_data])
+    values = np.array([r.get("status_read") or 0 for r in status_data], dtype=float)
+
+    matched = (rows >= 0) & (cols >= 0)
+    status_matrix = np.zeros((len(unique_ts), len(unique_chillers)), dtype=bool)
+    status_matrix[rows[matched], cols[matched]] = values[matched] >= CHILLER_RUNNING_STATUS
+    status = status_matrix[:, unique_chillers.get_indexer(chiller_ids)]
+
+    # Counts, masks and the row filter are computed per distinct timestamp,
+    # so fixed-count mode drops non-matching timestamps before any plant
+    # row is gathered or labeled
+    num_running, masks = _running_masks(status)
+    ts_keep = num_running > 0
+    if label_by == "chiller_combination_fixed_count" and fixed_chiller_count is not None:
+        ts_keep &= num_running == fixed_chiller_count
+    keep = np.flatnonzero(ts_keep[plant_codes])
+
+    if label_by in ("chiller_combination", "chiller_combination_fixed_count"):
+        codes = masks
+        if len(chiller_ids) <= COMBINATION_TABLE_MAX_CHILLERS:
+            format_label = _combination_label_table(tuple(chiller_ids)).__getitem__
+        else:
+            format_label = partial(_format_combination_label, tuple(chiller_ids))
+    else:
+        codes = num_running
+
+        def format_label(count: int) -> str:
+            if label_by == "chiller_count":
+                return f"{count} Chiller{'s' if count > 1 else ''}"
+            return f"{count} Chillers"
+
+    # Split x/y into per-label runs: one stable sort by code, then slice
+    codes = codes[plant_codes[keep]]
+    order = np.argsort(codes, kind="stable")
+    xs = plant_df[x_metric].to_numpy()[keep][order]
+    ys = plant_df[y_metric].to_numpy()[keep][order]
+    unique_codes, starts = np.unique(codes[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+    return {
+        format_label(int(code)): (xs[start:end].tolist(), ys[start:end].tolist())
+        for code, start, end in zip(unique_codes, starts, ends)
+    }
+
+
+def _build_labeled_trace(
+    label: str,
+    xs: List[Any],
+    ys: List[Any],
+    color: str,
+    max_points: int,
+) -> Dict[str, Any]:
+    """Build one labeled scatter trace, downsampled to max_points."""
+    if len(xs) > max_points:
+        keep = minmax_lttb_indices(_as_float_array(xs), _as_float_array(ys), max_points)
+        xs, ys = [xs[j] for j in keep], [ys[j] for j in keep]
+    return {
+        "type": "scatter",
+        "mode": "markers",
+        "name": label,
+        "x": _compact_floats(xs),
+        "y": _compact_floats(ys),
+        "marker": {
+            "size": 6,
+            "opacity": 0.7,
+            "color": color,
+        },
+    }
+
+
+# Axis titles for the labeled scatter metrics
+LABELED_SCATTER_X_LABELS: Dict[str, str] = {
+    "cooling_rate": "Cooling Load (RT)",
+    "power": "Power (kW)",
+}
+LABELED_SCATTER_Y_LABELS: Dict[str, str] = {
+    "efficiency": "Efficiency (kW/RT)",
+    "power": "Power (kW)",
+    "cooling_rate": "Cooling Load (RT)",
+}
+
+# In-process LRU cache of finished labeled scatter charts:
+# key -> (expiry, result). Results are copied in and out, so callers can
+# edit what they get without touching the cached chart.
+LABELED_SCATTER_CACHE_TTL = 300  # seconds
+LABELED_SCATTER_CACHE_MAX_ENTRIES = 32
+_labeled_scatter_cache: "OrderedDict[Tuple, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+
+def _cached_labeled_scatter(key: Tuple) -> Optional[Dict[str, Any]]:
+    """Copy of a fresh cached labeled scatter result, marking it recently used."""
+    entry = _labeled_scatter_cache.get(key)
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    _labeled_scatter_cache.move_to_end(key)
+    return copy.deepcopy(entry[1])
+
+
+def _cache_labeled_scatter(key: Tuple, result: Dict[str, Any]) -> None:
+    """Store a copy of a labeled scatter result, evicting expired then LRU entries."""
+    now = time.monotonic()
+    _labeled_scatter_cache.pop(key, None)
+    for k in [k for k, (exp, _) in _labeled_scatter_cache.items() if exp <= now]:
+        del _labeled_scatter_cache[k]
+    while len(_labeled_scatter_cache) >= LABELED_SCATTER_CACHE_MAX_ENTRIES:
+        _labeled_scatter_cache.popitem(last=False)
+    _labeled_scatter_cache[key] = (now + LABELED_SCATTER_CACHE_TTL, copy.deepcopy(result))
+
+
 async def execute_labeled_scatter_chart(
     site_id: str,
     title: str,
@@ -655,6 +998,7 @@ async def execute_labeled_scatter_chart(
     fixed_chiller_count: Optional[int] = None,
     min_cooling_load: float = 50,
     resolution: str = "15m",
+    max_points: int = MAX_CHART_POINTS,
     **kwargs,
 ) -> Dict[str, Any]:
     """Execute labeled scatter chart with server-side grouping.
@@ -662,10 +1006,6 @@ async def execute_labeled_scatter_chart(
     Queries plant data and chiller status, groups by label criteria,
     and returns a multi-trace scatter chart.
     """
-    from app.llm.tools.data_tools import execute_query_timeseries, execute_batch_query_timeseries
-    from collections import defaultdict
-    import asyncio
-
     logger.info(f"[LABELED_SCATTER] Starting: label_by={label_by}, chillers={chiller_ids}")
     logger.info(f"[LABELED_SCATTER] Time: {time_range}, Resolution: {resolution}")
 
@@ -684,18 +1024,44 @@ async def execute_labeled_scatter_chart(
             start_time = time_range
             end_time = "now"
 
-        # Step 1: Query plant data
-        plant_result = await execute_query_timeseries(
-            site_id=site_id,
-            device_id="plant",
-            datapoints=["power", "cooling_rate"],
-            start_time=start_time,
-            end_time=end_time,
-            resample=resolution,
-            filter_outliers=True,
-            min_load=min_cooling_load,
+        # Identical requests within the TTL reuse the finished chart. Ranges
+        # ending "now" also key on the TTL window so they roll forward.
+        cache_key = (
+            site_id, title, label_by, tuple(chiller_ids), start_time, end_time,
+            x_metric, y_metric, fixed_chiller_count, min_cooling_load,
+            resolution, max_points,
+            int(time.time() // LABELED_SCATTER_CACHE_TTL) if end_time == "now" else None,
+        )
+        cached = _cached_labeled_scatter(cache_key)
+        if cached is not None:
+            logger.info("[LABELED_SCATTER] Cache hit")
+            return cached
+
+        # Step 1: Query plant data and chiller status concurrently
+        plant_result, status_result = await asyncio.gather(
+            execute_query_timeseries(
+                site_id=site_id,
+                device_id="plant",
+                datapoints=["power", "cooling_rate"],
+                start_time=start_time,
+                end_time=end_time,
+                resample=resolution,
+                filter_outliers=True,
+                min_load=min_cooling_load,
+            ),
+            execute_batch_query_timeseries(
+                site_id=site_id,
+                device_ids=chiller_ids,
+                datapoints=["status_read"],
+                start_time=start_time,
+                end_time=end_time,
+                resample=resolution,
+            ),
+            return_exceptions=True,
         )
 
+        if isinstance(plant_result, Exception):
+            plant_result = {"error": str(plant_result)}
         if "error" in plant_result:
             return {"success": False, "error": f"Failed to query plant data: {plant_result['error']}"}
 
@@ -705,102 +1071,35 @@ async def execute_labeled_scatter_chart(
         if not plant_data:
             return {"success": False, "error": "No plant data returned"}
 
-        # Calculate efficiency for plant data
-        for record in plant_data:
-            power = record.get("power", 0)
-            cooling_rate = record.get("cooling_rate", 0)
-            if cooling_rate and cooling_rate > 0:
-                record["efficiency"] = round(power / cooling_rate, 4)
-            else:
-                record["efficiency"] = None
-
-        # Step 2: Query chiller status using batch query
-        status_result = await execute_batch_query_timeseries(
-            site_id=site_id,
-            device_ids=chiller_ids,
-            datapoints=["status_read"],
-            start_time=start_time,
-            end_time=end_time,
-            resample=resolution,
-        )
-
+        # Step 2: Check chiller status
+        if isinstance(status_result, Exception):
+            status_result = {"error": str(status_result)}
         if "error" in status_result:
             return {"success": False, "error": f"Failed to query chiller status: {status_result['error']}"}
 
         status_data = status_result.get("data", [])
         logger.info(f"[LABELED_SCATTER] Chiller status: {len(status_data)} rows")
 
-        # Build status lookup by timestamp -> {device_id: status}
-        status_by_ts: Dict[str, Dict[str, float]] = defaultdict(dict)
-        for record in status_data:
-            ts = record.get("timestamp")
-            device_id = record.get("device_id")
-            status = record.get("status_read", 0)
-            if ts and device_id:
-                status_by_ts[ts][device_id] = status if status else 0
-
         # Step 3: Join plant data with chiller status and compute labels
-        grouped_data: Dict[str, List[Dict]] = defaultdict(list)
-
-        for record in plant_data:
-            ts = record.get("timestamp")
-            x_val = record.get(x_metric)
-            y_val = record.get(y_metric)
-
-            if ts is None or x_val is None or y_val is None:
-                continue
-
-            # Get chiller statuses for this timestamp
-            statuses = status_by_ts.get(ts, {})
-
-            # Determine which chillers are running
-            running_chillers = [
-                ch for ch in chiller_ids
-                if statuses.get(ch, 0) >= 1
-            ]
-            num_running = len(running_chillers)
-
-            # Skip if no chillers running
-            if num_running == 0:
-                continue
-
-            # Compute label based on label_by
-            if label_by == "chiller_count":
-                label = f"{num_running} Chiller{'s' if num_running > 1 else ''}"
-            elif label_by == "chiller_combination":
-                # Format as "CH-1", "CH-1+CH-2", etc.
-                combo = "+".join([
-                    f"CH-{ch.split('_')[-1]}" for ch in sorted(running_chillers)
-                ])
-                label = combo
-            elif label_by == "chiller_combination_fixed_count":
-                if fixed_chiller_count is not None and num_running != fixed_chiller_count:
-                    continue  # Skip if not matching the fixed count
-                combo = "+".join([
-                    f"CH-{ch.split('_')[-1]}" for ch in sorted(running_chillers)
-                ])
-                label = combo
-            else:
-                label = f"{num_running} Chillers"
-
-            grouped_data[label].append({
-                "x": x_val,
-                "y": y_val,
-            })
+        grouped_data = _group_by_chiller_label(
+            plant_data=plant_data,
+            status_data=status_data,
+            chiller_ids=chiller_ids,
+            label_by=label_by,
+            x_metric=x_metric,
+            y_metric=y_metric,
+            fixed_chiller_count=fixed_chiller_count,
+        )
 
-        logger.info(f"[LABELED_SCATTER] Groups: {list(grouped_data.keys())}")
-        for label, points in grouped_data.items():
-            logger.info(f"[LABELED_SCATTER]   {label}: {len(points)} points")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"[LABELED_SCATTER] Groups: {list(grouped_data.keys())}")
+            for label, (xs, _) in grouped_data.items():
+                logger.info(f"[LABELED_SCATTER]   {label}: {len(xs)} points")
 
         if not grouped_data:
             return {"success": False, "error": "No data after grouping"}
 
         # Step 4: Build traces for multi-trace scatter
-        colors = [
-            "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
-            "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"
-        ]
-
         # Sort labels for consistent ordering
         if label_by == "chiller_count":
             # Sort numerically by chiller count
@@ -809,44 +1108,34 @@ async def execute_labeled_scatter_chart(
             # Sort alphabetically
             sorted_labels = sorted(grouped_data.keys())
 
-        traces = []
-        for i, label in enumerate(sorted_labels):
-            points = grouped_data[label]
-            traces.append({
-                "type": "scatter",
-                "mode": "markers",
-                "name": label,
-                "x": [p["x"] for p in points],
-                "y": [p["y"] for p in points],
-                "marker": {
-                    "size": 6,
-                    "opacity": 0.7,
-                    "color": colors[i % len(colors)],
-                },
-            })
-
-        # Build axis labels
-        x_label_map = {
-            "cooling_rate": "Cooling Load (RT)",
-            "power": "Power (kW)",
-        }
-        y_label_map = {
-            "efficiency": "Efficiency (kW/RT)",
-            "power": "Power (kW)",
-            "cooling_rate": "Cooling Load (RT)",
-        }
+        # Labels that need downsampling are built in worker threads (the
+        # NumPy work releases the GIL); small ones are cheaper inline
+        trace_args = [
+            (label, *grouped_data[label], TRACE_COLORS[i % len(TRACE_COLORS)], max_points)
+            for i, label in enumerate(sorted_labels)
+        ]
+        large = [i for i, args in enumerate(trace_args) if len(args[1]) > max_points]
+        traces = [
+            None if len(args[1]) > max_points else _build_labeled_trace(*args)
+            for args in trace_args
+        ]
+        built = await asyncio.gather(*(
+            asyncio.to_thread(_build_labeled_trace, *trace_args[i]) for i in large
+        ))
+        for i, trace in zip(large, built):
+            traces[i] = trace
 
         spec = {
             "data": traces,
             "layout": {
                 "title": {"text": title, "x": 0.5},
                 "xaxis": {
-                    "title": x_label_map.get(x_metric, x_metric),
+                    "title": LABELED_SCATTER_X_LABELS.get(x_metric, x_metric),
                     "gridcolor": "rgba(128,128,128,0.2)",
                     "showgrid": True,
                 },
                 "yaxis": {
-                    "title": y_label_map.get(y_metric, y_metric),
+                    "title": LABELED_SCATTER_Y_LABELS.get(y_metric, y_metric),
                     "gridcolor": "rgba(128,128,128,0.2)",
                     "showgrid": True,
                 },
@@ -857,10 +1146,10 @@ async def execute_labeled_scatter_chart(
             },
         }
 
-        total_points = sum(len(grouped_data[l]) for l in grouped_data)
+        total_points = sum(len(xs) for xs, _ in grouped_data.values())
         logger.info(f"[LABELED_SCATTER] Chart created: {len(traces)} traces, {total_points} points")
 
-        return {
+        result = {
             "success": True,
             "chart_type": "labeled_scatter",
             "plotly_spec": spec,
@@ -871,12 +1160,84 @@ async def execute_labeled_scatter_chart(
                 "time_range": time_range,
             },
         }
+        _cache_labeled_scatter(cache_key, result)
+        return result
 
     except Exception as e:
         logger.error(f"[LABELED_SCATTER] Failed: {e}", exc_info=True)
         return {"success": False, "error": str(e)}
 
 
+def _site_timezone(site_id: str) -> str:
+    """Timezone name for a site.
+
+    Not memoized here: get_site_by_id is already an indexed lookup, and its
+    index is cleared by reload_config, so a reload is picked up.
+    """
+    site = get_site_by_id(site_id)
+    return site.timezone if site else "Asia/Bangkok"
+
+
+@lru_cache(maxsize=64)
+def _get_zone(tz_name: str) -> tzinfo:
+    """Resolve a timezone name once, falling back to UTC if it is invalid."""
+    try:
+        return ZoneInfo(tz_name)
+    except Exception:
+        logger.warning(f"[CHART] Invalid timezone '{tz_name}', using UTC")
+        return timezone.utc
+
+
+def _convert_to_local(ts_str: str, tz: tzinfo) -> str:
+    """Convert one timestamp to tz (naive timestamps are taken as UTC)."""
+    try:
+        if ts_str.endswith("Z"):
+            dt = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
+        elif "+" in ts_str or ts_str.count("-") > 2:
+            dt = datetime.fromisoformat(ts_str)
+        else:
+            # Assume UTC if no timezone
+            dt = datetime.fromisoformat(ts_str).replace(tzinfo=timezone.utc)
+        return dt.astimezone(tz).isoformat()
+    except Exception:
+        return ts_str
+
+
+def _localize_timestamps(records: List[Dict[str, Any]], tz: tzinfo) -> None:
+    """Rewrite record timestamps in place as tz-local ISO 8601 strings.
+
+    The whole column is parsed and converted in one pandas pass and
+    formatted with NumPy, matching datetime.isoformat() output. Timestamps
+    with sub-second parts or that pandas can't parse take the per-value
+    path, which leaves unparseable values unchanged.
+    """
+    stamped = [r for r in records if "timestamp" in r]
+    if not stamped:
+        return
+    raw = [r["timestamp"] for r in stamped]
+
+    parsed = pd.to_datetime(raw, utc=True, format="ISO8601", errors="coerce", cache=True)
+    utc = parsed.tz_localize(None).to_numpy()
+    wall = parsed.tz_convert(tz).tz_localize(None).to_numpy()
+    fast = ~np.isnat(wall) & (wall.astype("datetime64[s]") == wall)
+    fast_flags = fast.tolist()
+
+    if fast.any():
+        offsets = (wall[fast] - utc[fast]) // np.timedelta64(1, "s")
+        unique_offsets, inverse = np.unique(offsets, return_inverse=True)
+        suffixes = np.array(
+            [_format_utc_offset(int(o)) for o in unique_offsets], dtype=object
+        )[inverse]
+        local = (np.datetime_as_string(wall[fast], unit="s").astype(object) + suffixes).tolist()
+        for record, ts in zip(compress(stamped, fast_flags), local):
+            record["timestamp"] = ts
+    if all(fast_flags):
+        return
+    for record, ts, ok in zip(stamped, raw, fast_flags):
+        if not ok:
+            record["timestamp"] = _convert_to_local(ts, tz)
+
+
 async def _execute_period_comparison(
     site_id: str,
     device_ids: List[str],
@@ -893,19 +1254,13 @@ async def _execute_period_comparison(
     - Y-axis: The metric value
     - Multiple lines: One per period (e.g., "Today", "Yesterday")
     """
-    from app.llm.tools.data_tools import execute_query_timeseries
-    from app.config import get_site_by_id
-    from datetime import datetime
-
-    logger.info(f"[PERIOD_COMPARE] Starting comparison: periods={compare_periods}")
+    logger.info("[PERIOD_COMPARE] Starting comparison: periods=%s", compare_periods)
 
     # Get site timezone
-    site = get_site_by_id(site_id)
-    site_timezone = site.timezone if site else "Asia/Bangkok"
-    logger.info(f"[PERIOD_COMPARE] Using timezone: {site_timezone}")
+    site_timezone = _site_timezone(site_id)
+    logger.info("[PERIOD_COMPARE] Using timezone: %s", site_timezone)
 
     traces = []
-    colors = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd"]
 
     # Determine the metric to plot
     if "efficiency" in metrics:
@@ -915,22 +1270,20 @@ async def _execute_period_comparison(
     else:
         y_metric = metrics[0]
 
+    # Metrics to query are the same for every device and period
+    query_metrics = list(metrics)
+    if calculate_efficiency:
+        query_metrics = list(dict.fromkeys(query_metrics + ["power", "cooling_rate"]))
+
     # Query each period
     for i, period in enumerate(compare_periods):
         start_time, end_time, label = _parse_period_to_dates(period, site_timezone)
-        logger.info(f"[PERIOD_COMPARE] Period '{label}': {start_time} to {end_time}")
+        logger.info("[PERIOD_COMPARE] Period '%s': %s to %s", label, start_time, end_time)
 
         period_data = []
 
         # Query each device for this period
         for device_id in device_ids:
-            # Determine which metrics to query
-            query_metrics = metrics.copy()
-            if calculate_efficiency and "power" not in query_metrics:
-                query_metrics.append("power")
-            if calculate_efficiency and "cooling_rate" not in query_metrics:
-                query_metrics.append("cooling_rate")
-
             result = await execute_query_timeseries(
                 site_id=site_id,
                 device_id=device_id,
@@ -946,17 +1299,7 @@ async def _execute_period_comparison(
                 continue
 
             device_data = result.get("data", [])
-            logger.info(f"[PERIOD_COMPARE] {device_id} ({label}): {len(device_data)} rows")
-
-            # Calculate efficiency if needed
-            if calculate_efficiency:
-                for record in device_data:
-                    power = record.get("power", 0)
-                    cooling_rate = record.get("cooling_rate", 0)
-                    if cooling_rate > 0:
-                        record["efficiency"] = round(power / cooling_rate, 3)
-                    else:
-                        record["efficiency"] = None
+            logger.info("[PERIOD_COMPARE] %s (%s): %d rows", device_id, label, len(device_data))
 
             period_data.extend(device_data)
 
@@ -964,33 +1307,38 @@ async def _execute_period_comparison(
             logger.warning(f"[PERIOD_COMPARE] No data for period '{label}'")
             continue
 
-        # Extract hour of day and metric values
-        hour_values: Dict[int, List[float]] = {}
-        for record in period_data:
-            ts_str = record.get("timestamp")
-            value = record.get(y_metric)
-
-            if ts_str and value is not None:
-                try:
-                    ts = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-                    hour = ts.hour
-                    if hour not in hour_values:
-                        hour_values[hour] = []
-                    hour_values[hour].append(value)
-                except:
-                    pass
-
-        # Average values per hour (in case of multiple data points per hour)
-        hours = sorted(hour_values.keys())
-        avg_values = [sum(hour_values[h]) / len(hour_values[h]) for h in hours]
+        # Average values per hour of day (in case of multiple data points
+        # per hour). Timestamps go through pandas' C ISO 8601 parser in one
+        # call; unparseable timestamps and missing values are skipped.
+        timestamps = pd.to_datetime(
+            [r.get("timestamp") for r in period_data],
+            utc=True, format="ISO8601", errors="coerce", cache=True,
+        )
+        if calculate_efficiency:
+            # Efficiency (kW/RT) as whole-column arithmetic; the records
+            # themselves are never returned, so nothing is written back
+            power = pd.Series([r.get("power", 0) for r in period_data], dtype="float64")
+            cooling_rate = pd.Series(
+                [r.get("cooling_rate", 0) for r in period_data], dtype="float64"
+            )
+            values = (power / cooling_rate.where(cooling_rate > 0)).round(3)
+        else:
+            values = pd.Series([r.get(y_metric) for r in period_data], dtype="float64")
+        valid = (timestamps.notna() & values.notna()).to_numpy()
+        hours = timestamps.hour.to_numpy()[valid].astype(np.int64)
+
+        # Fixed 24-slot sum/count buckets; hours with no data are omitted
+        sums = np.bincount(hours, weights=values.to_numpy()[valid], minlength=24)
+        counts = np.bincount(hours, minlength=24)
+        present = counts > 0
 
         traces.append({
             "type": "scatter",
             "mode": "lines+markers",
             "name": label,
-            "x": hours,
-            "y": [round(v, 3) for v in avg_values],
-            "line": {"width": 2, "color": colors[i % len(colors)]},
+            "x": np.flatnonzero(present).tolist(),
+            "y": np.round(sums[present] / counts[present], 3).tolist(),
+            "line": {"width": 2, "color": TRACE_COLORS[i % len(TRACE_COLORS)]},
             "marker": {"size": 6},
         })
 
@@ -1019,7 +1367,7 @@ async def _execute_period_comparison(
         },
     }
 
-    logger.info(f"[PERIOD_COMPARE] Chart created with {len(traces)} traces")
+    logger.info("[PERIOD_COMPARE] Chart created with %d traces", len(traces))
 
     return {
         "success": True,
@@ -1036,20 +1384,19 @@ async def _execute_period_comparison(
 def _parse_period_to_dates(period: str, site_timezone: str = "Asia/Bangkok") -> tuple:
     """Convert period name to start/end datetime in site's timezone.
 
+    Results are reused within the same minute, so "today" ends at most a
+    minute before the actual current time.
+
     Returns (start_time, end_time, label) tuple.
     """
-    from datetime import datetime, timedelta, timezone
-    try:
-        from zoneinfo import ZoneInfo
-    except ImportError:
-        from backports.zoneinfo import ZoneInfo
+    return _period_dates(period, site_timezone, int(time.time() // 60))
+
 
+@lru_cache(maxsize=256)
+def _period_dates(period: str, site_timezone: str, minute: int) -> tuple:
+    """Uncached body of _parse_period_to_dates (minute is only a cache key)."""
     # Use site's timezone
-    try:
-        tz = ZoneInfo(site_timezone)
-    except:
-        tz = timezone.utc
-        logger.warning(f"[PERIOD_COMPARE] Invalid timezone '{site_timezone}', using UTC")
+    tz = _get_zone(site_timezone)
 
     now = datetime.now(tz)
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -1079,6 +1426,22 @@ def _parse_period_to_dates(period: str, site_timezone: str = "Asia/Bangkok") ->
             return (period, "now", period)
 
 
+def _in_hour_window(ts: Any, start_hour: int, end_hour: int) -> bool:
+    """Whether an ISO timestamp's hour is in [start_hour, end_hour).
+
+    Unparseable timestamps count as inside the window.
+    """
+    # Fast path: the hour of an ISO 8601 "YYYY-MM-DDTHH..." string is its
+    # wall-clock hour, no parse needed
+    if isinstance(ts, str) and len(ts) >= 13 and ts[10] in "T " and ts[11:13].isdigit():
+        return start_hour <= int(ts[11:13]) < end_hour
+    try:
+        hour = datetime.fromisoformat(ts.replace("Z", "+00:00")).hour
+    except (AttributeError, ValueError):
+        return True
+    return start_hour <= hour < end_hour
+
+
 async def _apply_filters(
     site_id: str,
     data: List[Dict[str, Any]],
@@ -1095,16 +1458,10 @@ async def _apply_filters(
     - min_cooling_load: minimum cooling_rate value
     - time_of_day: {"start": 8, "end": 18} - filter by hour
     """
-    from app.llm.tools.data_tools import execute_query_timeseries
-    from datetime import datetime
-
     if not data or not filters:
         return data
 
-    logger.info(f"[FILTER] Applying filters: {filters}")
-
-    # Build a map of timestamp -> status for each device we need to check
-    status_by_timestamp: Dict[str, Dict[str, int]] = {}
+    logger.info("[FILTER] Applying filters: %s", filters)
 
     # Collect all devices we need status for
     devices_to_check = set()
@@ -1117,88 +1474,253 @@ async def _apply_filters(
         for i in range(1, 9):
             devices_to_check.add(f"chiller_{i}")
 
-    # Query status for each device
-    for device_id in devices_to_check:
-        result = await execute_query_timeseries(
-            site_id=site_id,
-            device_id=device_id,
-            datapoints=["status_read"],
-            start_time=time_range,
-            end_time="now",
-            resample=resolution,
-            filter_outliers=False,
+    # Query status for all devices concurrently
+    device_list = sorted(devices_to_check)
+    results = await asyncio.gather(
+        *(
+            execute_query_timeseries(
+                site_id=site_id,
+                device_id=device_id,
+                datapoints=["status_read"],
+                start_time=time_range,
+                end_time="now",
+                resample=resolution,
+                filter_outliers=False,
+            )
+            for device_id in device_list
+        ),
+        return_exceptions=True,
+    )
+
+    # timestamp x device running matrix over the data's distinct timestamps,
+    # filled by direct index assignment (missing readings count as stopped)
+    timestamps = np.array([r.get("timestamp") for r in data], dtype=object)
+    codes, unique_ts = pd.factorize(timestamps)
+    unique_ts = pd.Index(unique_ts)
+    running = np.zeros((len(unique_ts), len(device_list)), dtype=bool)
+
+    for col, (device_id, result) in enumerate(zip(device_list, results)):
+        if isinstance(result, Exception):
+            logger.warning(f"[FILTER] Status query failed for {device_id}: {result}")
+            continue
+        if "error" in result:
+            continue
+        rows = result.get("data", [])
+        idx = unique_ts.get_indexer([row.get("timestamp") for row in rows])
+        status = np.array([row.get("status_read") or 0 for row in rows], dtype=float)
+        matched = idx >= 0
+        running[idx[matched], col] = status[matched] >= 1
+
+    logger.info(
+        "[FILTER] Loaded status for %d devices, %d timestamps", len(device_list), len(unique_ts)
+    )
+
+    # Records without a timestamp are always dropped
+    keep = (codes >= 0) & timestamps.astype(bool)
+    row_codes = np.where(keep, codes, 0)
+    row_running = running[row_codes]
+    columns = {device_id: col for col, device_id in enumerate(device_list)}
+
+    # Filter: only_running - these devices must have status >= 1
+    only_running = [columns[d] for d in filters.get("only_running", ())]
+    if only_running:
+        keep &= row_running[:, only_running].all(axis=1)
+
+    # Filter: not_running - these devices must have status < 1
+    not_running = [columns[d] for d in filters.get("not_running", ())]
+    if not_running:
+        keep &= ~row_running[:, not_running].any(axis=1)
+
+    # Filter: num_chillers_running - count running chillers
+    if "num_chillers_running" in filters:
+        chillers = [col for d, col in columns.items() if d.startswith("chiller_")]
+        keep &= row_running[:, chillers].sum(axis=1) == filters["num_chillers_running"]
+
+    # The remaining filters read record fields / parse timestamps in Python,
+    # so they only look at rows that survived the status masks
+
+    # Filter: min_cooling_load (missing cooling_rate counts as 0)
+    if "min_cooling_load" in filters:
+        rows = np.flatnonzero(keep)
+        cooling_rate = np.array(
+            [data[i].get("cooling_rate") or 0 for i in rows.tolist()], dtype=float
         )
+        keep[rows] = cooling_rate >= filters["min_cooling_load"]
+
+    # Filter: time_of_day, on each distinct timestamp's own wall-clock hour.
+    # Unparseable timestamps and malformed windows are not filtered.
+    time_of_day = filters.get("time_of_day")
+    if isinstance(time_of_day, dict) and keep.any():
+        start_hour = time_of_day.get("start", 0)
+        end_hour = time_of_day.get("end", 24)
+        live = np.unique(row_codes[keep])
+        in_window = np.ones(len(unique_ts), dtype=bool)
+        try:
+            in_window[live] = [
+                _in_hour_window(unique_ts[i], start_hour, end_hour) for i in live.tolist()
+            ]
+            keep &= in_window[row_codes]
+        except TypeError:
+            pass
 
-        if "error" not in result:
-            for row in result.get("data", []):
-                ts = row.get("timestamp")
-                status = row.get("status_read", 0)
-                if ts:
-                    if ts not in status_by_timestamp:
-                        status_by_timestamp[ts] = {}
-                    status_by_timestamp[ts][device_id] = status if status else 0
-
-    logger.info(f"[FILTER] Loaded status for {len(devices_to_check)} devices, {len(status_by_timestamp)} timestamps")
-
-    # Apply filters
-    filtered_data = []
-    for record in data:
-        ts = record.get("timestamp")
-        if not ts:
-            continue
+    filtered_data = list(compress(data, keep.tolist()))
 
-        statuses = status_by_timestamp.get(ts, {})
-        keep = True
-
-        # Filter: only_running - these devices must have status >= 1
-        if "only_running" in filters:
-            for device in filters["only_running"]:
-                if statuses.get(device, 0) < 1:
-                    keep = False
-                    break
-
-        # Filter: not_running - these devices must have status < 1
-        if keep and "not_running" in filters:
-            for device in filters["not_running"]:
-                if statuses.get(device, 0) >= 1:
-                    keep = False
-                    break
-
-        # Filter: num_chillers_running - count running chillers
-        if keep and "num_chillers_running" in filters:
-            target_count = filters["num_chillers_running"]
-            running_count = sum(
-                1 for d, s in statuses.items()
-                if d.startswith("chiller_") and s >= 1
-            )
-            if running_count != target_count:
-                keep = False
-
-        # Filter: min_cooling_load
-        if keep and "min_cooling_load" in filters:
-            cooling_rate = record.get("cooling_rate", 0)
-            if cooling_rate < filters["min_cooling_load"]:
-                keep = False
-
-        # Filter: time_of_day
-        if keep and "time_of_day" in filters:
-            try:
-                ts_dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                hour = ts_dt.hour
-                start_hour = filters["time_of_day"].get("start", 0)
-                end_hour = filters["time_of_day"].get("end", 24)
-                if not (start_hour <= hour < end_hour):
-                    keep = False
-            except:
-                pass
-
-        if keep:
-            filtered_data.append(record)
-
-    logger.info(f"[FILTER] Filtered from {len(data)} to {len(filtered_data)} rows")
+    logger.info("[FILTER] Filtered from %d to %d rows", len(data), len(filtered_data))
     return filtered_data
 
 
+def _build_line_spec(
+    all_data: List[Dict[str, Any]],
+    data_by_device: Dict[str, List[Dict[str, Any]]],
+    device_ids: List[str],
+    metrics: List[str],
+    title: str,
+    x_metric: Optional[str],
+    y_metric: Optional[str],
+    calculate_efficiency: bool,
+    max_points: int,
+) -> Dict[str, Any]:
+    """query_and_chart line spec: all metrics for one device, else one per device."""
+    x_field = "timestamp"
+    if len(device_ids) == 1:
+        # Single device: show all metrics
+        y_fields = metrics + (["efficiency"] if calculate_efficiency else [])
+        y_fields = [m for m in y_fields if m in all_data[0]]
+        return PlotlyBuilder.line_chart(
+            data=_downsample_line_records(all_data, y_fields, max_points),
+            x_field=x_field,
+            y_fields=y_fields,
+            title=title,
+            x_label="Time",
+            y_label="Value",
+        )
+
+    # Multiple devices: show one metric per device
+    primary_metric = y_metric or ("efficiency" if calculate_efficiency else metrics[0])
+    traces = []
+    for device_id, device_data in data_by_device.items():
+        device_data = _downsample_line_records(device_data, [primary_metric], max_points)
+        # Two comprehensions beat one fused append loop here (~1.3x on 100k
+        # records): comprehension appends skip the method call. The scatter
+        # branch fuses because it filters on both fields.
+        x_vals = [r.get("timestamp") for r in device_data]
+        y_vals = [r.get(primary_metric) for r in device_data]
+        traces.append({
+            "type": "scatter",
+            "mode": "lines",
+            "name": device_id.replace("_", " ").title(),
+            "x": x_vals,
+            "y": y_vals,
+        })
+    return {
+        "data": traces,
+        "layout": {
+            "title": {"text": title, "x": 0.5},
+            "xaxis": {"title": "Time", "type": "date"},
+            "yaxis": {"title": primary_metric.replace("_", " ").title()},
+            "hovermode": "x unified",
+            "legend": {"orientation": "h", "y": -0.2},
+        },
+    }
+
+
+def _build_scatter_spec(
+    all_data: List[Dict[str, Any]],
+    data_by_device: Dict[str, List[Dict[str, Any]]],
+    device_ids: List[str],
+    metrics: List[str],
+    title: str,
+    x_metric: Optional[str],
+    y_metric: Optional[str],
+    calculate_efficiency: bool,
+    max_points: int,
+) -> Dict[str, Any]:
+    """query_and_chart scatter spec, one colored trace per device."""
+    x_field = x_metric or ("cooling_rate" if "cooling_rate" in metrics else metrics[0])
+    y_field = y_metric or ("efficiency" if calculate_efficiency else metrics[-1])
+
+    if len(device_ids) == 1:
+        return PlotlyBuilder.scatter_chart(
+            data=_downsample_scatter_records(all_data, x_field, y_field, max_points),
+            x_field=x_field,
+            y_field=y_field,
+            title=title,
+            x_label=x_field.replace("_", " ").title(),
+            y_label=y_field.replace("_", " ").title(),
+        )
+
+    # Multiple devices: different colors
+    traces = []
+    for i, (device_id, device_data) in enumerate(data_by_device.items()):
+        device_data = _downsample_scatter_records(device_data, x_field, y_field, max_points)
+        # One pass: look up each field once, keep complete pairs
+        x_vals, y_vals = [], []
+        for r in device_data:
+            x, y = r.get(x_field), r.get(y_field)
+            if x is not None and y is not None:
+                x_vals.append(x)
+                y_vals.append(y)
+        traces.append({
+            "type": "scatter",
+            "mode": "markers",
+            "name": device_id.replace("_", " ").title(),
+            "x": x_vals,
+            "y": y_vals,
+            "marker": {"size": 6, "opacity": 0.6, "color": TRACE_COLORS[i % len(TRACE_COLORS)]},
+        })
+    return {
+        "data": traces,
+        "layout": {
+            "title": {"text": title, "x": 0.5},
+            "xaxis": {"title": x_field.replace("_", " ").title()},
+            "yaxis": {"title": y_field.replace("_", " ").title()},
+            "hovermode": "closest",
+            "legend": {"orientation": "h", "y": -0.2},
+        },
+    }
+
+
+def _build_bar_spec(
+    all_data: List[Dict[str, Any]],
+    data_by_device: Dict[str, List[Dict[str, Any]]],
+    device_ids: List[str],
+    metrics: List[str],
+    title: str,
+    x_metric: Optional[str],
+    y_metric: Optional[str],
+    calculate_efficiency: bool,
+    max_points: int,
+) -> Dict[str, Any]:
+    """query_and_chart bar spec: the metric's mean per device."""
+    y_field = y_metric or ("efficiency" if calculate_efficiency else metrics[0])
+
+    bar_data = []
+    for device_id, device_data in data_by_device.items():
+        values = [r.get(y_field) for r in device_data if r.get(y_field) is not None]
+        if values:
+            bar_data.append({
+                "device": device_id.replace("_", " ").title(),
+                "value": round(fmean(values), 2),
+            })
+
+    return PlotlyBuilder.bar_chart(
+        data=bar_data,
+        x_field="device",
+        y_field="value",
+        title=title,
+        x_label="Device",
+        y_label=y_field.replace("_", " ").title(),
+    )
+
+
+# query_and_chart chart_type -> spec builder
+_SPEC_BUILDERS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "line": _build_line_spec,
+    "scatter": _build_scatter_spec,
+    "bar": _build_bar_spec,
+}
+
+
 async def execute_query_and_chart(
     site_id: str,
     device_ids: List[str],
@@ -1212,19 +1734,18 @@ async def execute_query_and_chart(
     y_metric: Optional[str] = None,
     calculate_efficiency: bool = False,
     resolution: str = "1h",
+    max_points: int = MAX_CHART_POINTS,
     **kwargs,
 ) -> Dict[str, Any]:
     """Execute combined query and chart creation."""
-    from app.llm.tools.data_tools import execute_query_timeseries
-    from app.config import get_site_by_id
-    from datetime import datetime, timezone
-    from zoneinfo import ZoneInfo
-
-    logger.info(f"[QUERY_AND_CHART] Starting: devices={device_ids}, metrics={metrics}, type={chart_type}")
+    logger.info(
+        "[QUERY_AND_CHART] Starting: devices=%s, metrics=%s, type=%s",
+        device_ids, metrics, chart_type,
+    )
     if compare_periods:
-        logger.info(f"[QUERY_AND_CHART] Compare periods: {compare_periods}")
+        logger.info("[QUERY_AND_CHART] Compare periods: %s", compare_periods)
     if filters:
-        logger.info(f"[QUERY_AND_CHART] Filters: {filters}")
+        logger.info("[QUERY_AND_CHART] Filters: %s", filters)
 
     try:
         # Handle period comparison mode
@@ -1239,28 +1760,40 @@ async def execute_query_and_chart(
                 resolution=resolution,
             )
 
+        builder = _SPEC_BUILDERS.get(chart_type)
+        if builder is None:
+            return {"success": False, "error": f"Unknown chart type: {chart_type}"}
+
         all_data = []
         data_by_device = {}
 
-        # Query each device
-        for device_id in device_ids:
-            result = await execute_query_timeseries(
-                site_id=site_id,
-                device_id=device_id,
-                datapoints=metrics,
-                start_time=time_range,
-                end_time="now",
-                resample=resolution,
-                filter_outliers=True,
-                min_load=50 if calculate_efficiency else None,
-            )
+        # Query all devices concurrently
+        results = await asyncio.gather(
+            *(
+                execute_query_timeseries(
+                    site_id=site_id,
+                    device_id=device_id,
+                    datapoints=metrics,
+                    start_time=time_range,
+                    end_time="now",
+                    resample=resolution,
+                    filter_outliers=True,
+                    min_load=50 if calculate_efficiency else None,
+                )
+                for device_id in device_ids
+            ),
+            return_exceptions=True,
+        )
 
+        for device_id, result in zip(device_ids, results):
+            if isinstance(result, Exception):
+                result = {"error": str(result)}
             if "error" in result:
                 logger.warning(f"[QUERY_AND_CHART] Query failed for {device_id}: {result['error']}")
                 continue
 
             device_data = result.get("data", [])
-            logger.info(f"[QUERY_AND_CHART] {device_id}: {len(device_data)} rows")
+            logger.info("[QUERY_AND_CHART] %s: %d rows", device_id, len(device_data))
 
             # Calculate efficiency if requested
             if calculate_efficiency and "power" in metrics and "cooling_rate" in metrics:
@@ -1283,36 +1816,11 @@ async def execute_query_and_chart(
             return {"success": False, "error": "No data returned from queries"}
 
         # Convert timestamps to site's local timezone
-        site = get_site_by_id(site_id)
-        site_tz = ZoneInfo(site.timezone if site else "Asia/Bangkok")
-
-        def convert_to_local(ts_str: str) -> str:
-            """Convert UTC timestamp to site's local timezone."""
-            try:
-                # Parse the timestamp
-                if ts_str.endswith("Z"):
-                    dt = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-                elif "+" in ts_str or ts_str.count("-") > 2:
-                    dt = datetime.fromisoformat(ts_str)
-                else:
-                    # Assume UTC if no timezone
-                    dt = datetime.fromisoformat(ts_str).replace(tzinfo=timezone.utc)
-
-                # Convert to local timezone
-                local_dt = dt.astimezone(site_tz)
-                return local_dt.isoformat()
-            except Exception:
-                return ts_str
-
-        for record in all_data:
-            if "timestamp" in record:
-                record["timestamp"] = convert_to_local(record["timestamp"])
-
-        # Also update data_by_device for multi-device charts
-        for device_id in data_by_device:
-            for record in data_by_device[device_id]:
-                if "timestamp" in record:
-                    record["timestamp"] = convert_to_local(record["timestamp"])
+        site_tz = _get_zone(_site_timezone(site_id))
+
+        # data_by_device holds the same record objects, so this converts
+        # both views
+        _localize_timestamps(all_data, site_tz)
 
         # Apply filters if specified
         if filters:
@@ -1323,118 +1831,26 @@ async def execute_query_and_chart(
                 time_range=time_range,
                 resolution=resolution,
             )
-            logger.info(f"[QUERY_AND_CHART] After filtering: {len(all_data)} rows")
+            logger.info("[QUERY_AND_CHART] After filtering: %d rows", len(all_data))
 
             if not all_data:
                 return {"success": False, "error": "No data after applying filters"}
 
-        logger.info(f"[QUERY_AND_CHART] Total data points: {len(all_data)}")
-
-        # Determine axis fields
-        if chart_type == "line":
-            x_field = "timestamp"
-            if len(device_ids) == 1:
-                # Single device: show all metrics
-                y_fields = metrics + (["efficiency"] if calculate_efficiency else [])
-                spec = PlotlyBuilder.line_chart(
-                    data=all_data,
-                    x_field=x_field,
-                    y_fields=[m for m in y_fields if m in all_data[0]],
-                    title=title,
-                    x_label="Time",
-                    y_label="Value",
-                )
-            else:
-                # Multiple devices: show one metric per device
-                primary_metric = y_metric or ("efficiency" if calculate_efficiency else metrics[0])
-                traces = []
-                for device_id, device_data in data_by_device.items():
-                    x_vals = [r.get("timestamp") for r in device_data]
-                    y_vals = [r.get(primary_metric) for r in device_data]
-                    traces.append({
-                        "type": "scatter",
-                        "mode": "lines",
-                        "name": device_id.replace("_", " ").title(),
-                        "x": x_vals,
-                        "y": y_vals,
-                    })
-                spec = {
-                    "data": traces,
-                    "layout": {
-                        "title": {"text": title, "x": 0.5},
-                        "xaxis": {"title": "Time", "type": "date"},
-                        "yaxis": {"title": primary_metric.replace("_", " ").title()},
-                        "hovermode": "x unified",
-                        "legend": {"orientation": "h", "y": -0.2},
-                    },
-                }
-
-        elif chart_type == "scatter":
-            x_field = x_metric or ("cooling_rate" if "cooling_rate" in metrics else metrics[0])
-            y_field = y_metric or ("efficiency" if calculate_efficiency else metrics[-1])
-
-            if len(device_ids) == 1:
-                spec = PlotlyBuilder.scatter_chart(
-                    data=all_data,
-                    x_field=x_field,
-                    y_field=y_field,
-                    title=title,
-                    x_label=x_field.replace("_", " ").title(),
-                    y_label=y_field.replace("_", " ").title(),
-                )
-            else:
-                # Multiple devices: different colors
-                traces = []
-                colors = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd"]
-                for i, (device_id, device_data) in enumerate(data_by_device.items()):
-                    x_vals = [r.get(x_field) for r in device_data if r.get(x_field) is not None and r.get(y_field) is not None]
-                    y_vals = [r.get(y_field) for r in device_data if r.get(x_field) is not None and r.get(y_field) is not None]
-                    traces.append({
-                        "type": "scatter",
-                        "mode": "markers",
-                        "name": device_id.replace("_", " ").title(),
-                        "x": x_vals,
-                        "y": y_vals,
-                        "marker": {"size": 6, "opacity": 0.6, "color": colors[i % len(colors)]},
-                    })
-                spec = {
-                    "data": traces,
-                    "layout": {
-                        "title": {"text": title, "x": 0.5},
-                        "xaxis": {"title": x_field.replace("_", " ").title()},
-                        "yaxis": {"title": y_field.replace("_", " ").title()},
-                        "hovermode": "closest",
-                        "legend": {"orientation": "h", "y": -0.2},
-                    },
-                }
-
-        elif chart_type == "bar":
-            # Aggregate by device for bar chart
-            from statistics import mean
-            y_field = y_metric or ("efficiency" if calculate_efficiency else metrics[0])
-
-            bar_data = []
-            for device_id, device_data in data_by_device.items():
-                values = [r.get(y_field) for r in device_data if r.get(y_field) is not None]
-                if values:
-                    bar_data.append({
-                        "device": device_id.replace("_", " ").title(),
-                        "value": round(mean(values), 2),
-                    })
-
-            spec = PlotlyBuilder.bar_chart(
-                data=bar_data,
-                x_field="device",
-                y_field="value",
-                title=title,
-                x_label="Device",
-                y_label=y_field.replace("_", " ").title(),
-            )
+        logger.info("[QUERY_AND_CHART] Total data points: %d", len(all_data))
 
-        else:
-            return {"success": False, "error": f"Unknown chart type: {chart_type}"}
+        spec = builder(
+            all_data=all_data,
+            data_by_device=data_by_device,
+            device_ids=device_ids,
+            metrics=metrics,
+            title=title,
+            x_metric=x_metric,
+            y_metric=y_metric,
+            calculate_efficiency=calculate_efficiency,
+            max_points=max_points,
+        )
 
-        logger.info(f"[QUERY_AND_CHART] Chart created successfully")
+        logger.info("[QUERY_AND_CHART] Chart created successfully")
 
         return {
             "success": True,
@@ -1453,6 +1869,8 @@ async def execute_query_and_chart(
 
 
 # Map tool names to executors
+# Sync executors. All are CPU-bound (they walk the full data arrays to build
+# Plotly specs), so execute_tool runs them in a worker thread.
 TOOL_EXECUTORS = {
     "create_line_chart": execute_create_line_chart,
     "create_scatter_chart": execute_create_scatter_chart,
@@ -1468,7 +1886,11 @@ ASYNC_TOOL_EXECUTORS = {
     "labeled_scatter_chart": execute_labeled_scatter_chart,
 }
 
-# All chart tool definitions
+# All chart tool definitions. These stay plain dicts rather than pre-encoded
+# JSON: the Anthropic SDK transforms and encodes the whole request body
+# itself and has no pass-through for raw bytes. Repeat cost is handled by
+# sharing these lists across requests (see get_tool_definitions) and by the
+# cache_control breakpoint on the last tool.
 CHART_TOOLS = [
     QUERY_AND_CHART_TOOL,  # Put this first so AI sees it first
     LABELED_SCATTER_CHART_TOOL,  # Server-side grouping for labeled scatter (much faster!)
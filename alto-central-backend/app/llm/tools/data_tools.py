@@ -5,16 +5,48 @@ for historical and real-time HVAC data.
 """
 
 import logging
+import re
+import sys
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Tuple
-import statistics
+from itertools import compress, groupby
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple, TypedDict
+
+import numpy as np
+import pandas as pd
 
 from app.db.connections import get_timescale, get_supabase
+from app.db.connections.timescale import AGGREGATE_GROUPS
 from app.config import get_site_by_id
 
 logger = logging.getLogger(__name__)
 
 
+class QueryTimeseriesResult(TypedDict, total=False):
+    """Result of query_timeseries (only "error" is set on failure)."""
+
+    device_id: str
+    datapoints: List[str]
+    start_time: str
+    end_time: str
+    row_count: int
+    data: List[Dict[str, Any]]
+    filter_stats: Dict[str, Any]
+    error: str
+
+
+class BatchQueryTimeseriesResult(TypedDict):
+    """Result of batch_query_timeseries; records are tagged with device_id."""
+
+    device_ids: List[str]
+    datapoints: List[str]
+    start_time: str
+    end_time: str
+    total_rows: int
+    data: List[Dict[str, Any]]
+    errors: Optional[List[str]]
+
+
 # HVAC-specific valid ranges for common datapoints
 # Values outside these ranges are considered outliers/sensor errors
 HVAC_VALUE_BOUNDS: Dict[str, Tuple[float, float]] = {
@@ -41,36 +73,137 @@ HVAC_VALUE_BOUNDS: Dict[str, Tuple[float, float]] = {
     "humidity": (0, 100),  # %
 }
 
+# HVAC_VALUE_BOUNDS as parallel arrays, indexed through _HVAC_BOUND_INDEX
+_HVAC_BOUND_INDEX: Dict[str, int] = {dp: i for i, dp in enumerate(HVAC_VALUE_BOUNDS)}
+_HVAC_LOWER = np.array([lo for lo, _ in HVAC_VALUE_BOUNDS.values()], dtype=np.float64)
+_HVAC_UPPER = np.array([hi for _, hi in HVAC_VALUE_BOUNDS.values()], dtype=np.float64)
+
 
 def _filter_outliers_iqr(
-    values: List[float],
+    values: np.ndarray,
     multiplier: float = 1.5,
-) -> Tuple[float, float]:
-    """Calculate outlier bounds using IQR method.
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculate outlier bounds per column using the IQR method.
+
+    All columns are sorted in one np.sort; NaN (missing) values sort to the
+    end, so each column's first `count` entries are its present values.
+    Columns with fewer than 4 values are bounded by their min and max, and
+    columns with none get infinite bounds.
 
     Args:
-        values: List of numeric values
+        values: (records, datapoints) matrix; NaN marks a missing value
         multiplier: IQR multiplier (1.5 = standard, 3.0 = extreme only)
 
     Returns:
-        Tuple of (lower_bound, upper_bound)
+        Tuple of (lower_bound, upper_bound) arrays, one entry per column
     """
-    if len(values) < 4:
-        return (min(values), max(values))
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+    lower = np.full(values.shape[1], -np.inf)
+    upper = np.full(values.shape[1], np.inf)
+    cols = np.flatnonzero(counts)
+    if not len(cols):
+        return lower, upper
+
+    # A full np.sort, not np.partition: NumPy's vectorized sort measured
+    # 1.5-4x faster than introselect here, even with only the two
+    # quartile indices as kth, and every column's n differs anyway
+    sorted_values = np.sort(values[:, cols], axis=0)
+    n = counts[cols]
+    column = np.arange(len(cols))
+
+    # Quartiles are the sorted values at n//4 and 3n//4 (no interpolation)
+    q1 = sorted_values[n // 4, column]
+    q3 = sorted_values[(3 * n) // 4, column]
+    iqr = q3 - q1
+    small = n < 4
+    lower[cols] = np.where(small, sorted_values[0], q1 - (multiplier * iqr))
+    upper[cols] = np.where(small, sorted_values[n - 1, column], q3 + (multiplier * iqr))
 
-    sorted_values = sorted(values)
-    n = len(sorted_values)
-    q1_idx = n // 4
-    q3_idx = (3 * n) // 4
+    return lower, upper
 
-    q1 = sorted_values[q1_idx]
-    q3 = sorted_values[q3_idx]
-    iqr = q3 - q1
 
-    lower_bound = q1 - (multiplier * iqr)
-    upper_bound = q3 + (multiplier * iqr)
+def _outlier_keep_mask(
+    values: np.ndarray,
+    datapoints: List[str],
+    method: str = "iqr",
+    iqr_multiplier: float = 1.5,
+    use_hvac_bounds: bool = True,
+) -> Tuple[np.ndarray, Dict[str, Dict[str, float]]]:
+    """Compute outlier bounds per column and the rows that satisfy them.
 
-    return (lower_bound, upper_bound)
+    Args:
+        values: (records, datapoints) matrix; NaN marks a missing value,
+            which never causes a record to be dropped
+        datapoints: Datapoint name of each column
+        method: Filtering method - "iqr", "hvac_bounds", or "both"
+        iqr_multiplier: IQR multiplier for statistical filtering
+        use_hvac_bounds: Whether to apply HVAC-specific bounds
+
+    Returns:
+        Tuple of (keep mask per record, {datapoint: {"lower", "upper"}})
+    """
+    has_values = ~np.isnan(values).all(axis=0)
+
+    # Calculate bounds for each datapoint (infinite where none apply),
+    # starting from the IQR-based bounds
+    if method in ("iqr", "both"):
+        lower, upper = _filter_outliers_iqr(values, iqr_multiplier)
+    else:
+        lower = np.full(len(datapoints), -np.inf)
+        upper = np.full(len(datapoints), np.inf)
+
+    # Apply HVAC-specific bounds
+    if use_hvac_bounds:
+        hvac = np.array([_HVAC_BOUND_INDEX.get(dp, -1) for dp in datapoints], dtype=np.int64)
+        known = (hvac >= 0) & has_values
+        lower[known] = np.maximum(lower[known], _HVAC_LOWER[hvac[known]])
+        upper[known] = np.minimum(upper[known], _HVAC_UPPER[hvac[known]])
+
+    # Round all bounds in one call for the stats
+    rounded_lower, rounded_upper = np.round(np.stack([lower, upper]), 2).tolist()
+    bounds_stats = {
+        dp: {"lower": lo, "upper": hi}
+        for dp, lo, hi, seen in zip(
+            datapoints, rounded_lower, rounded_upper, has_values.tolist()
+        )
+        if seen
+    }
+
+    return _bounds_keep_mask(values, lower, upper), bounds_stats
+
+
+def _bounds_keep_mask(
+    values: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+) -> np.ndarray:
+    """Rows of `values` whose every value lies within [lower, upper].
+
+    Comparisons against NaN are False, so missing values never drop a row
+    and need no separate mask. Flags are OR-ed column by column into one
+    record-length vector: reducing a (records x datapoints) matrix across
+    its short row axis measured several times slower.
+    """
+    out_of_bounds = np.zeros(len(values), dtype=bool)
+    for j in range(values.shape[1]):
+        column = values[:, j]
+        out_of_bounds |= column < lower[j]
+        out_of_bounds |= column > upper[j]
+    return ~out_of_bounds
+
+
+def _outlier_stats(
+    original_count: int,
+    filtered_count: int,
+    bounds: Dict[str, Dict[str, float]],
+) -> Dict[str, Any]:
+    """filter_stats entry for an outlier filtering pass."""
+    return {
+        "original_count": original_count,
+        "filtered_count": filtered_count,
+        "removed_count": original_count - filtered_count,
+        "bounds": bounds,
+    }
 
 
 def _apply_outlier_filter(
@@ -95,63 +228,120 @@ def _apply_outlier_filter(
     if not data:
         return data, {}
 
-    filter_stats = {
-        "original_count": len(data),
-        "filtered_count": 0,
-        "removed_count": 0,
-        "bounds": {},
-    }
+    # Column matrix of the filtered datapoints, filled one datapoint column
+    # at a time (a single scan per key); missing/None values are NaN
+    values = np.empty((len(data), len(datapoints)))
+    for j, dp in enumerate(datapoints):
+        values[:, j] = np.array([record.get(dp) for record in data], dtype=np.float64)
+    keep, bounds = _outlier_keep_mask(
+        values, datapoints, method, iqr_multiplier, use_hvac_bounds
+    )
+    filtered_data = list(compress(data, keep.tolist()))
 
-    # Calculate bounds for each datapoint
-    bounds: Dict[str, Tuple[float, float]] = {}
+    return filtered_data, _outlier_stats(len(data), len(filtered_data), bounds)
 
-    for dp in datapoints:
-        # Collect all values for this datapoint
-        values = [
-            record[dp] for record in data
-            if dp in record and record[dp] is not None
-        ]
 
-        if not values:
-            continue
+def _pivot_rows(
+    rows: List[Dict[str, Any]],
+    datapoints: List[str],
+) -> Tuple[Any, np.ndarray, np.ndarray]:
+    """Pivot (timestamp, datapoint, value) rows into a timestamp x datapoint matrix.
 
-        # Start with infinite bounds
-        lower, upper = float('-inf'), float('inf')
-
-        # Apply IQR-based bounds
-        if method in ("iqr", "both"):
-            iqr_lower, iqr_upper = _filter_outliers_iqr(values, iqr_multiplier)
-            lower = max(lower, iqr_lower)
-            upper = min(upper, iqr_upper)
-
-        # Apply HVAC-specific bounds
-        if use_hvac_bounds and dp in HVAC_VALUE_BOUNDS:
-            hvac_lower, hvac_upper = HVAC_VALUE_BOUNDS[dp]
-            lower = max(lower, hvac_lower)
-            upper = min(upper, hvac_upper)
-
-        bounds[dp] = (lower, upper)
-        filter_stats["bounds"][dp] = {"lower": round(lower, 2), "upper": round(upper, 2)}
-
-    # Filter data
-    filtered_data = []
-    for record in data:
-        keep = True
-        for dp in datapoints:
-            if dp not in record or record[dp] is None:
-                continue
-            if dp in bounds:
-                lower, upper = bounds[dp]
-                if not (lower <= record[dp] <= upper):
-                    keep = False
-                    break
-        if keep:
-            filtered_data.append(record)
-
-    filter_stats["filtered_count"] = len(filtered_data)
-    filter_stats["removed_count"] = len(data) - len(filtered_data)
-
-    return filtered_data, filter_stats
+    Rows are placed by direct index assignment; for a repeated
+    (timestamp, datapoint) the last row wins. Rows for datapoints outside
+    `datapoints` are ignored.
+
+    Returns:
+        Tuple of (sorted unique timestamps as a DatetimeIndex, or an object
+        array when they mix UTC offsets, values with NaN for missing or
+        None, mask of cells that had a row)
+    """
+    raw_timestamps = [row["timestamp"] for row in rows]
+    try:
+        # Factorize as datetime64 rather than hashing datetime objects
+        stamps = pd.DatetimeIndex(raw_timestamps)
+    except (TypeError, ValueError):
+        # Mixed UTC offsets can't share one datetime64 index
+        stamps = np.array(raw_timestamps, dtype=object)
+    codes, timestamps = pd.factorize(stamps, sort=True)
+    column_of = {dp: j for j, dp in enumerate(datapoints)}
+    cols = np.array([column_of.get(row["datapoint"], -1) for row in rows], dtype=np.int64)
+    vals = np.array([row["value"] for row in rows], dtype=np.float64)
+
+    matched = cols >= 0
+    values = np.full((len(timestamps), len(datapoints)), np.nan)
+    present = np.zeros((len(timestamps), len(datapoints)), dtype=bool)
+    values[codes[matched], cols[matched]] = vals[matched]
+    present[codes[matched], cols[matched]] = True
+    return timestamps, values, present
+
+
+def _format_utc_offset(seconds: int) -> str:
+    """Format a UTC offset the way datetime.isoformat() does (+07:00)."""
+    sign = "-" if seconds < 0 else "+"
+    hours, rest = divmod(abs(seconds), 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{sign}{hours:02d}:{minutes:02d}" + (f":{secs:02d}" if secs else "")
+
+
+def _isoformat_timestamps(timestamps: Any) -> List[str]:
+    """datetime.isoformat() of each timestamp, formatted in one NumPy pass.
+
+    Timestamps with sub-second parts or mixed UTC offsets (which pandas
+    can't hold in one index) take the per-value isoformat() path.
+    """
+    try:
+        index = pd.DatetimeIndex(timestamps)
+    except (TypeError, ValueError):
+        return [ts.isoformat() for ts in timestamps]
+
+    wall = index.tz_localize(None).to_numpy() if index.tz is not None else index.to_numpy()
+    if (wall.astype("datetime64[s]") != wall).any():
+        return [ts.isoformat() for ts in timestamps]
+
+    text = np.datetime_as_string(wall, unit="s").astype(object)
+    if index.tz is None:
+        return text.tolist()
+
+    # Offsets are almost always a single value (UTC); format each once
+    utc = index.tz_convert("UTC").tz_localize(None).to_numpy()
+    offsets = (wall - utc) // np.timedelta64(1, "s")
+    unique_offsets, inverse = np.unique(offsets, return_inverse=True)
+    suffixes = np.array(
+        [_format_utc_offset(int(o)) for o in unique_offsets], dtype=object
+    )[inverse]
+    return (text + suffixes).tolist()
+
+
+def _matrix_to_records(
+    timestamps: Any,
+    values: np.ndarray,
+    present: np.ndarray,
+    datapoints: List[str],
+) -> List[Dict[str, Any]]:
+    """Build {"timestamp", <datapoint>: value} records from a pivoted matrix.
+
+    A datapoint key is set only where its row existed; NaN becomes None.
+    Timestamps are interned: callers join devices on these strings, and
+    identical interned keys compare by identity in dict lookups.
+    """
+    ts_strings = [sys.intern(ts) for ts in _isoformat_timestamps(timestamps)]
+    cells = values.astype(object)
+    cells[np.isnan(values)] = None
+    columns = [cells[:, j].tolist() for j in range(len(datapoints))]
+
+    if present.all():
+        keys = ("timestamp", *datapoints)
+        return [dict(zip(keys, row)) for row in zip(ts_strings, *columns)]
+
+    records = []
+    for i, (ts, row_present) in enumerate(zip(ts_strings, present.tolist())):
+        record = {"timestamp": ts}
+        for j, dp in enumerate(datapoints):
+            if row_present[j]:
+                record[dp] = columns[j][i]
+        records.append(record)
+    return records
 
 
 # Tool definitions for Claude API
@@ -329,6 +519,23 @@ Example: "compare chiller_1 and chiller_2" -> use device_ids=["chiller_1", "chil
 }
 
 
+# Relative time strings ('7d', '24h', '30m', '2w') and their units
+_RELATIVE_TIME_RE = re.compile(r"^(\d+)\s*([dhmw])$")
+_RELATIVE_TIME_UNITS: Dict[str, timedelta] = {
+    "d": timedelta(days=1),
+    "h": timedelta(hours=1),
+    "m": timedelta(minutes=1),
+    "w": timedelta(weeks=1),
+}
+
+
+def _ensure_tz(dt: datetime) -> datetime:
+    """Ensure datetime has timezone info (default to UTC if naive)."""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
 def _parse_relative_time(time_str: str, is_end: bool = False) -> datetime:
     """Parse relative time string like '7d', '24h', '1h' to datetime.
 
@@ -337,16 +544,14 @@ def _parse_relative_time(time_str: str, is_end: bool = False) -> datetime:
 
     Naive datetimes (without timezone) are assumed to be UTC.
     """
-    now = datetime.now(timezone.utc)
-
     if time_str == "now":
-        return now
+        return datetime.now(timezone.utc)
 
-    def _ensure_tz(dt: datetime) -> datetime:
-        """Ensure datetime has timezone info (default to UTC if naive)."""
-        if dt.tzinfo is None:
-            return dt.replace(tzinfo=timezone.utc)
-        return dt
+    # Relative time is the common case; match it before trying ISO parsing
+    match = _RELATIVE_TIME_RE.match(time_str.strip().lower())
+    if match:
+        count, unit = match.groups()
+        return datetime.now(timezone.utc) - int(count) * _RELATIVE_TIME_UNITS[unit]
 
     # Handle ISO 8601 interval format (start/end separated by /)
     # Supports both datetime (2025-11-01T00:00:00/2025-11-30T23:59:59) and date-only (2025-11-01/2025-11-30)
@@ -366,28 +571,13 @@ def _parse_relative_time(time_str: str, is_end: bool = False) -> datetime:
             except ValueError:
                 pass
 
-    # Try to parse as ISO timestamp first
+    # Try to parse as ISO timestamp
     try:
         dt = datetime.fromisoformat(time_str.replace("Z", "+00:00"))
         return _ensure_tz(dt)
     except ValueError:
         pass
 
-    # Parse relative time
-    time_str = time_str.strip().lower()
-    if time_str.endswith("d"):
-        days = int(time_str[:-1])
-        return now - timedelta(days=days)
-    elif time_str.endswith("h"):
-        hours = int(time_str[:-1])
-        return now - timedelta(hours=hours)
-    elif time_str.endswith("m"):
-        minutes = int(time_str[:-1])
-        return now - timedelta(minutes=minutes)
-    elif time_str.endswith("w"):
-        weeks = int(time_str[:-1])
-        return now - timedelta(weeks=weeks)
-
     raise ValueError(f"Cannot parse time: {time_str}")
 
 
@@ -400,7 +590,7 @@ async def execute_query_timeseries(
     resample: Optional[str] = None,
     filter_outliers: bool = True,
     min_load: Optional[float] = None,
-) -> Dict[str, Any]:
+) -> QueryTimeseriesResult:
     """Execute timeseries query and return data with outlier filtering.
 
     Returns:
@@ -426,57 +616,57 @@ async def execute_query_timeseries(
         if not timescale.is_connected:
             return {"error": f"Database not connected for site {site_id}"}
 
+        # Low-load timestamps are filtered below; the database already
+        # leaves out their rows other than cooling_rate
+        apply_min_load = min_load is not None and "cooling_rate" in datapoints
         rows = await timescale.query_timeseries(
             device_id=device_id,
             datapoints=datapoints,
             start_time=start_dt,
             end_time=end_dt,
             resample=resample,
+            min_filter=("cooling_rate", min_load) if apply_min_load else None,
         )
 
-        # Pivot rows: {timestamp -> {datapoint -> value}}
-        pivoted: Dict[datetime, Dict[str, float]] = {}
-        for row in rows:
-            ts = row["timestamp"]
-            dp = row["datapoint"]
-            val = row["value"]
-            if ts not in pivoted:
-                pivoted[ts] = {}
-            pivoted[ts][dp] = val
-
-        # Convert to list of records
-        data = []
-        for ts in sorted(pivoted.keys()):
-            record = {"timestamp": ts.isoformat()}
-            record.update(pivoted[ts])
-            data.append(record)
+        # Pivot into a timestamp x datapoint matrix; the min_load and outlier
+        # filters run on the matrix and records are built only for the
+        # surviving rows
+        columns = list(dict.fromkeys(datapoints))
+        timestamps, values, present = _pivot_rows(rows, columns)
 
         filter_stats = None
 
-        # Apply min_load filter (for efficiency charts, filter low-load noise)
-        if min_load is not None and "cooling_rate" in datapoints:
-            original_count = len(data)
-            data = [r for r in data if r.get("cooling_rate", 0) >= min_load]
+        # Apply min_load filter (for efficiency charts, filter low-load noise;
+        # a missing cooling_rate counts as 0)
+        if apply_min_load:
+            original_count = len(timestamps)
+            cooling_rate = values[:, columns.index("cooling_rate")]
+            keep = np.nan_to_num(cooling_rate, nan=0.0) >= min_load
+            timestamps, values, present = timestamps[keep], values[keep], present[keep]
             filter_stats = {
                 "min_load_filter": min_load,
-                "removed_by_min_load": original_count - len(data),
+                "removed_by_min_load": original_count - len(timestamps),
             }
 
         # Apply outlier filtering
-        if filter_outliers and data:
-            data, outlier_stats = _apply_outlier_filter(
-                data=data,
-                datapoints=datapoints,
+        if filter_outliers and len(timestamps):
+            keep, bounds = _outlier_keep_mask(
+                values,
+                columns,
                 method="both",  # Use both IQR and HVAC bounds
                 iqr_multiplier=1.5,
                 use_hvac_bounds=True,
             )
+            outlier_stats = _outlier_stats(len(timestamps), int(keep.sum()), bounds)
+            timestamps, values, present = timestamps[keep], values[keep], present[keep]
             if filter_stats:
                 filter_stats.update(outlier_stats)
             else:
                 filter_stats = outlier_stats
 
-        result = {
+        data = _matrix_to_records(timestamps, values, present, columns)
+
+        result: QueryTimeseriesResult = {
             "device_id": device_id,
             "datapoints": datapoints,
             "start_time": start_dt.isoformat(),
@@ -512,6 +702,9 @@ async def execute_query_realtime(
             }
         }
     """
+    # Requested devices as a set for O(1) membership (None -> all devices)
+    wanted = set(device_ids) if device_ids else None
+
     try:
         # Try Supabase first
         site = get_site_by_id(site_id)
@@ -520,18 +713,13 @@ async def execute_query_realtime(
             if supabase.is_connected:
                 all_data = await supabase.get_latest_data()
                 if all_data:
-                    # Filter by device_ids if specified
-                    if device_ids:
-                        all_data = {
-                            d: v for d, v in all_data.items() if d in device_ids
-                        }
-
-                    # Simplify structure (remove updated_at for cleaner output)
-                    devices = {}
-                    for device_id, datapoints in all_data.items():
-                        devices[device_id] = {
-                            dp: info.get("value") for dp, info in datapoints.items()
-                        }
+                    # Filter by device_ids if specified and simplify structure
+                    # (remove updated_at for cleaner output) in one pass
+                    devices = {
+                        device_id: {dp: info.get("value") for dp, info in datapoints.items()}
+                        for device_id, datapoints in all_data.items()
+                        if wanted is None or device_id in wanted
+                    }
 
                     return {
                         "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -547,7 +735,7 @@ async def execute_query_realtime(
             devices: Dict[str, Dict[str, float]] = {}
             for row in rows:
                 device_id = row["device_id"]
-                if device_ids and device_id not in device_ids:
+                if wanted is not None and device_id not in wanted:
                     continue
                 if device_id not in devices:
                     devices[device_id] = {}
@@ -598,14 +786,20 @@ async def execute_aggregate_data(
         if not timescale.is_connected:
             return {"error": f"Database not connected for site {site_id}"}
 
-        # Fetch raw data first
-        rows = await timescale.query_timeseries(
-            device_id=device_id,
-            datapoints=[datapoint],
-            start_time=start_dt,
-            end_time=end_dt,
-            resample="1h" if group_by in ["hour", "hour_of_day", "day"] else None,
-        )
+        if group_by not in AGGREGATE_GROUPS:
+            rows = []
+        else:
+            # Group and aggregate on the server; hourly and daily groups
+            # aggregate hourly averages
+            rows = await timescale.query_aggregate(
+                device_id=device_id,
+                datapoint=datapoint,
+                start_time=start_dt,
+                end_time=end_dt,
+                group_by=group_by,
+                aggregation=aggregation,
+                resample="1h" if group_by in ["hour", "hour_of_day", "day"] else None,
+            )
 
         if not rows:
             return {
@@ -616,57 +810,20 @@ async def execute_aggregate_data(
                 "data": [],
             }
 
-        # Group and aggregate in memory
-        from collections import defaultdict
-
-        groups: Dict[Any, List[float]] = defaultdict(list)
-
-        for row in rows:
-            ts = row["timestamp"]
-            val = row["value"]
-            if val is None:
-                continue
-
-            if group_by == "hour_of_day":
-                key = ts.hour
-            elif group_by == "hour":
-                key = ts.replace(minute=0, second=0, microsecond=0)
-            elif group_by == "day":
-                key = ts.date()
-            elif group_by == "week":
-                key = ts.isocalendar()[:2]  # (year, week)
-            elif group_by == "month":
-                key = (ts.year, ts.month)
-            else:
-                key = ts
-
-            groups[key].append(val)
-
-        # Apply aggregation
-        agg_funcs = {
-            "avg": lambda x: sum(x) / len(x) if x else 0,
-            "sum": sum,
-            "min": min,
-            "max": max,
-            "count": len,
-        }
-        agg_func = agg_funcs.get(aggregation, agg_funcs["avg"])
-
         data = []
-        for key in sorted(groups.keys()):
-            values = groups[key]
-            agg_value = agg_func(values)
+        for row in rows:
+            agg_value = row["value"]
 
             if group_by == "hour_of_day":
-                data.append({"hour": key, "value": round(agg_value, 2)})
+                data.append({"hour": row["hour"], "value": round(agg_value, 2)})
             elif group_by == "hour":
-                data.append({"timestamp": key.isoformat(), "value": round(agg_value, 2)})
+                data.append({"timestamp": row["timestamp"].isoformat(), "value": round(agg_value, 2)})
             elif group_by == "day":
-                data.append({"date": key.isoformat(), "value": round(agg_value, 2)})
+                data.append({"date": row["date"].isoformat(), "value": round(agg_value, 2)})
             elif group_by == "week":
-                data.append({"year": key[0], "week": key[1], "value": round(agg_value, 2)})
+                data.append({"year": row["year"], "week": row["week"], "value": round(agg_value, 2)})
             elif group_by == "month":
-                data.append({"year": key[0], "month": key[1], "value": round(agg_value, 2)})
+                data.append({"year": row["year"], "month": row["month"], "value": round(agg_value, 2)})
 
         return {
             "device_id": device_id,
@@ -689,48 +846,55 @@ async def execute_batch_query_timeseries(
     start_time: str,
     end_time: str,
     resample: str = "15m",
-) -> Dict[str, Any]:
-    """Query multiple devices in parallel and return combined data.
+) -> BatchQueryTimeseriesResult:
+    """Query multiple devices in a single database query and return combined data.
 
     Returns:
         Dict with device_id tagged in each record for easy grouping.
     """
-    import asyncio
-
     logger.info(f"[BATCH_QUERY] Querying {len(device_ids)} devices: {device_ids}")
     logger.info(f"[BATCH_QUERY] Datapoints: {datapoints}, Time: {start_time} to {end_time}")
 
-    # Query all devices in parallel
-    async def query_device(device_id: str) -> Dict[str, Any]:
-        result = await execute_query_timeseries(
-            site_id=site_id,
-            device_id=device_id,
-            datapoints=datapoints,
-            start_time=start_time,
-            end_time=end_time,
-            resample=resample,
-            filter_outliers=False,  # Don't filter for status queries
-        )
-        # Tag each record with device_id
-        if "data" in result:
-            for record in result["data"]:
-                record["device_id"] = device_id
-        return result
-
-    results = await asyncio.gather(*[query_device(d) for d in device_ids])
-
-    # Combine all data
     all_data = []
     total_rows = 0
     errors = []
 
-    for device_id, result in zip(device_ids, results):
-        if "error" in result:
-            errors.append(f"{device_id}: {result['error']}")
-        else:
-            data = result.get("data", [])
-            all_data.extend(data)
-            total_rows += len(data)
+    try:
+        start_dt = _parse_relative_time(start_time, is_end=False)
+        end_dt = _parse_relative_time(end_time, is_end=True)
+
+        timescale = await get_timescale(site_id)
+        if not timescale.is_connected:
+            raise ConnectionError(f"Database not connected for site {site_id}")
+
+        # One query for every device instead of one round trip per device
+        rows = await timescale.query_timeseries_devices(
+            device_ids=list(dict.fromkeys(device_ids)),
+            datapoints=datapoints,
+            start_time=start_dt,
+            end_time=end_dt,
+            resample=resample,
+        )
+    except Exception as e:
+        logger.error(f"batch_query_timeseries failed: {e}")
+        errors = [f"{device_id}: {e}" for device_id in device_ids]
+        rows = []
+
+    # Rows arrive ordered by device; pivot each device's run separately
+    columns = list(dict.fromkeys(datapoints))
+    device_rows = {
+        device_id: list(group)
+        for device_id, group in groupby(rows, key=itemgetter("device_id"))
+    }
+
+    for device_id in device_ids:
+        if device_id not in device_rows:
+            continue
+        data = _matrix_to_records(*_pivot_rows(device_rows[device_id], columns), columns)
+        for record in data:
+            record["device_id"] = device_id
+        all_data.extend(data)
+        total_rows += len(data)
 
     logger.info(f"[BATCH_QUERY] Total rows: {total_rows}, Errors: {len(errors)}")
 
@@ -745,6 +909,127 @@ async def execute_batch_query_timeseries(
     }
 
 
+# Define device type patterns and their datapoints
+# Use patterns like "chiller_{N}" - AI should use exact device IDs from user prompt
+# e.g., "compare chiller_1 and chiller_2" -> query device_ids: ["chiller_1", "chiller_2"]
+DEVICE_TYPES: Dict[str, Dict[str, Any]] = {
+    "plant": {
+        "pattern": "plant",
+        "description": "Overall plant aggregate data",
+        "datapoints": [
+            "cooling_rate",
+            "cumulative_cooling_energy",
+            "cumulative_energy",
+            "efficiency",
+            "efficiency_annual",
+            "efficiency_cdp",
+            "efficiency_chiller",
+            "efficiency_ct",
+            "efficiency_pchp",
+            "heat_balance",
+            "heat_reject",
+            "number_of_running_cdps",
+            "number_of_running_chillers",
+            "number_of_running_cts",
+            "number_of_running_pchps",
+            "power",
+            "power_all_cdps",
+            "power_all_chillers",
+            "power_all_cts",
+            "power_all_pchps",
+            "running_capacity",
+            "target_cdw_setpoint",
+            "target_chw_setpoint"
+        ],
+    },
+    "chiller": {
+        "pattern": "chiller_{N}",
+        "description": "Individual chillers (chiller_1, chiller_2, chiller_3, etc.)",
+        "datapoints": [
+            "alarm",
+            "compressor_runtime",
+            "cond_approach_temperature",
+            "cond_delta_temperature",
+            "cond_entering_water_temperature",
+            "cond_leaving_water_temperature",
+            "cond_sat_refrig_pressure",
+            "cond_sat_refrig_temperature",
+            "cond_water_flow_rate",
+            "cond_water_flow_status",
+            "cooling_rate",
+            "cumulative_energy",
+            "current_average",
+            "current_l1",
+            "current_l2",
+            "current_l3",
+            "demand_limit_setpoint_local",
+            "demand_limit_setpoint_read",
+            "demand_limit_setpoint_write",
+            "efficiency",
+            "evap_approach_temperature",
+            "evap_delta_temperature",
+            "evap_entering_water_temperature",
+            "evap_leaving_water_temperature",
+            "evap_sat_refrig_pressure",
+            "evap_sat_refrig_temperature",
+            "evap_water_flow_rate",
+            "evap_water_flow_status",
+            "heat_balance",
+            "heat_reject",
+            "mode",
+            "oil_diff_pressure",
+            "oil_pump_disc_temperature",
+            "oil_tank_pressure",
+            "oil_tank_temperature",
+            "percentage_rla",
+            "power",
+            "power_factor",
+            "running_capacity",
+            "setpoint_local",
+            "setpoint_read",
+            "setpoint_write",
+            "status_local",
+            "status_read",
+            "status_write",
+            "voltage_l1l2",
+            "voltage_l2l3",
+            "voltage_l3l1",
+            "voltage_ll_average"
+        ],
+    },
+    "chilled_water_loop": {
+        "pattern": "chilled_water_loop",
+        "description": "Chilled water loop",
+        "datapoints": ["supply_water_temperature", "return_water_temperature", "flow_rate", "water_delta_temperature"],
+    },
+    "condenser_water_loop": {
+        "pattern": "condenser_water_loop",
+        "description": "Condenser water loop",
+        "datapoints": ["supply_water_temperature", "return_water_temperature", "flow_rate", "water_delta_temperature"],
+    },
+    "ct": {
+        "pattern": "ct_{N}",
+        "description": "Cooling towers (cooling_tower_1, cooling_tower_2, etc.)",
+        "datapoints": ["alarm", "status_read"],
+    },
+    "weather": {
+        "pattern": "outdoor_weather_station",
+        "description": "Outdoor weather station",
+        "datapoints": ["drybulb_temperature", "wetbulb_temperature", "humidity"],
+    },
+    "pump": {
+        "pattern": "pchp_{N}, schp_{N}, cdp_{N}",
+        "description": "Pumps - primary (pchp), secondary (schp), condenser (cdp)",
+        "datapoints": ["status_read", "efficiency", "power", "alarm", "freqeuncy_read"],
+    },
+    "indoor_air_quality": {
+        "pattern": "indoor_air_quality_{N}",
+        "description": "Indoor air quality",
+        "datapoints": ["humidity", "temperature"],
+    },
+}
+
+
 async def execute_list_available_datapoints(
     site_id: str,
     device_type: Optional[str] = None,
@@ -767,135 +1052,13 @@ async def execute_list_available_datapoints(
             }
         }
     """
-    # Define device type patterns and their datapoints
-    # Use patterns like "chiller_{N}" - AI should use exact device IDs from user prompt
-    # e.g., "compare chiller_1 and chiller_2" -> query device_ids: ["chiller_1", "chiller_2"]
-    device_types = {
-        "plant": {
-            "pattern": "plant",
-            "description": "Overall plant aggregate data",
-            "datapoints": [
-                "cooling_rate",
-                "cumulative_cooling_energy",
-                "cumulative_energy",
-                "efficiency",
-                "efficiency_annual",
-                "efficiency_cdp",
-                "efficiency_chiller",
-                "efficiency_ct",
-                "efficiency_pchp",
-                "heat_balance",
-                "heat_reject",
-                "number_of_running_cdps",
-                "number_of_running_chillers",
-                "number_of_running_cts",
-                "number_of_running_pchps",
-                "power",
-                "power_all_cdps",
-                "power_all_chillers",
-                "power_all_cts",
-                "power_all_pchps",
-                "running_capacity",
-                "target_cdw_setpoint",
-                "target_chw_setpoint"
-            ],
-        },
-        "chiller": {
-            "pattern": "chiller_{N}",
-            "description": "Individual chillers (chiller_1, chiller_2, chiller_3, etc.)",
-            "datapoints": [
-                "alarm",
-                "compressor_runtime",
-                "cond_approach_temperature",
-                "cond_delta_temperature",
-                "cond_entering_water_temperature",
-                "cond_leaving_water_temperature",
-                "cond_sat_refrig_pressure",
-                "cond_sat_refrig_temperature",
-                "cond_water_flow_rate",
-                "cond_water_flow_status",
-                "cooling_rate",
-                "cumulative_energy",
-                "current_average",
-                "current_l1",
-                "current_l2",
-                "current_l3",
-                "demand_limit_setpoint_local",
-                "demand_limit_setpoint_read",
-                "demand_limit_setpoint_write",
-                "efficiency",
-                "evap_approach_temperature",
-                "evap_delta_temperature",
-                "evap_entering_water_temperature",
-                "evap_leaving_water_temperature",
-                "evap_sat_refrig_pressure",
-                "evap_sat_refrig_temperature",
-                "evap_water_flow_rate",
-                "evap_water_flow_status",
-                "heat_balance",
-                "heat_reject",
-                "mode",
-                "oil_diff_pressure",
-                "oil_pump_disc_temperature",
-                "oil_tank_pressure",
-                "oil_tank_temperature",
-                "percentage_rla",
-                "power",
-                "power_factor",
-                "running_capacity",
-                "setpoint_local",
-                "setpoint_read",
-                "setpoint_write",
-                "status_local",
-                "status_read",
-                "status_write",
-                "voltage_l1l2",
-                "voltage_l2l3",
-                "voltage_l3l1",
-                "voltage_ll_average"
-            ],
-        },
-        "chilled_water_loop": {
-            "pattern": "chilled_water_loop",
-            "description": "Chilled water loop",
-            "datapoints": ["supply_water_temperature", "return_water_temperature", "flow_rate", "water_delta_temperature"],
-        },
-        "condenser_water_loop": {
-            "pattern": "condenser_water_loop",
-            "description": "Condenser water loop",
-            "datapoints": ["supply_water_temperature", "return_water_temperature", "flow_rate", "water_delta_temperature"],
-        },
-        "ct": {
-            "pattern": "ct_{N}",
-            "description": "Cooling towers (cooling_tower_1, cooling_tower_2, etc.)",
-            "datapoints": ["alarm", "status_read"],
-        },
-        "weather": {
-            "pattern": "outdoor_weather_station",
-            "description": "Outdoor weather station",
-            "datapoints": ["drybulb_temperature", "wetbulb_temperature", "humidity"],
-        },
-        "pump": {
-            "pattern": "pchp_{N}, schp_{N}, cdp_{N}",
-            "description": "Pumps - primary (pchp), secondary (schp), condenser (cdp)",
-            "datapoints": ["status_read", "efficiency", "power", "alarm", "freqeuncy_read"],
-        },
-        "indoor_air_quality": {
-            "pattern": "indoor_air_quality_{N}",
-            "description": "Indoor air quality",
-            "datapoints": ["humidity", "temperature"],
-        },
-    }
-
     # Filter by device type
     if device_type and device_type != "all":
-        filtered = {
-            d: info
-            for d, info in device_types.items()
-            if d == device_type
-        }
+        filtered = (
+            {device_type: DEVICE_TYPES[device_type]} if device_type in DEVICE_TYPES else {}
+        )
     else:
-        filtered = device_types
+        filtered = DEVICE_TYPES
 
     return {"device_types": filtered}
 
@@ -8,17 +8,7 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 
 from app.analytics.templates.manager import get_template_manager
-from app.analytics.templates.schema import (
-    ChartTemplate,
-    TriggerMatching,
-    TemplateMetadata,
-    DataConfig,
-    DataQuery,
-    ChartConfig,
-    ChartLayout,
-    ChartTrace,
-    AxisConfig,
-)
+from app.analytics.templates.schema import ChartTemplate
 
 logger = logging.getLogger(__name__)
 
@@ -108,75 +98,73 @@ async def execute_save_chart_template(
     try:
         manager = get_template_manager()
 
-        # Build the template from provided config
-        # Convert data_config dict to DataConfig model
-        queries = []
-        for q in data_config.get("queries", []):
-            queries.append(
-                DataQuery(
-                    query_id=q.get("query_id", "default"),
-                    device_id=q.get("device_id", "plant"),
-                    datapoints=q.get("datapoints", []),
-                )
-            )
-
-        data = DataConfig(
-            source=data_config.get("source", "timescale"),
-            queries=queries if queries else [DataQuery(query_id="default", device_id="plant", datapoints=["power"])],
-            resampling=data_config.get("resampling"),
-        )
+        # Build the template from provided config as plain data and
+        # validate it once: a single model_validate call runs in
+        # pydantic-core instead of one Python-level constructor per model
+        queries = [
+            {
+                "query_id": q.get("query_id", "default"),
+                "device_id": q.get("device_id", "plant"),
+                "datapoints": q.get("datapoints", []),
+            }
+            for q in data_config.get("queries", [])
+        ]
+        data = {
+            "source": data_config.get("source", "timescale"),
+            "queries": queries or [{"query_id": "default", "device_id": "plant", "datapoints": ["power"]}],
+            "resampling": data_config.get("resampling"),
+        }
 
-        # Convert chart_config dict to ChartConfig model
-        traces = []
-        for t in chart_config.get("traces", []):
-            traces.append(
-                ChartTrace(
-                    name=t.get("name", "Data"),
-                    type=t.get("type", "scatter"),
-                    mode=t.get("mode"),
-                    x_field=t.get("x_field", "timestamp"),
-                    y_field=t.get("y_field", "value"),
-                )
-            )
+        traces = [
+            {
+                "name": t.get("name", "Data"),
+                "type": t.get("type", "scatter"),
+                "mode": t.get("mode"),
+                "x_field": t.get("x_field", "timestamp"),
+                "y_field": t.get("y_field", "value"),
+            }
+            for t in chart_config.get("traces", [])
+        ]
 
         layout_config = chart_config.get("layout", {})
-        layout = ChartLayout(
-            title=layout_config.get("title", title),
-            xaxis=AxisConfig(
-                title=layout_config.get("xaxis", {}).get("title", "X"),
-                field=layout_config.get("xaxis", {}).get("field", "timestamp"),
-            ),
-            yaxis=AxisConfig(
-                title=layout_config.get("yaxis", {}).get("title", "Y"),
-                field=layout_config.get("yaxis", {}).get("field", "value"),
-            ),
-        )
+        layout = {
+            "title": layout_config.get("title", title),
+            "xaxis": {
+                "title": layout_config.get("xaxis", {}).get("title", "X"),
+                "field": layout_config.get("xaxis", {}).get("field", "timestamp"),
+            },
+            "yaxis": {
+                "title": layout_config.get("yaxis", {}).get("title", "Y"),
+                "field": layout_config.get("yaxis", {}).get("field", "value"),
+            },
+        }
 
-        chart = ChartConfig(
-            type=chart_config.get("type", "line"),
-            layout=layout,
-            traces=traces if traces else [ChartTrace(name="Data", type="scatter", mode="lines", x_field="timestamp", y_field="value")],
-        )
+        chart = {
+            "type": chart_config.get("type", "line"),
+            "layout": layout,
+            "traces": traces or [{"name": "Data", "type": "scatter", "mode": "lines", "x_field": "timestamp", "y_field": "value"}],
+        }
 
-        template = ChartTemplate(
-            template_id=template_id,
-            version="1.0.0",
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-            created_by="ai",
-            matching=TriggerMatching(
-                trigger_phrases=trigger_phrases,
-                confidence_threshold=0.7,
-            ),
-            metadata=TemplateMetadata(
-                title=title,
-                description=description,
-                category=category,
-                tags=[],
-            ),
-            data=data,
-            chart=chart,
-        )
+        now = datetime.utcnow()
+        template = ChartTemplate.model_validate({
+            "template_id": template_id,
+            "version": "1.0.0",
+            "created_at": now,
+            "updated_at": now,
+            "created_by": "ai",
+            "matching": {
+                "trigger_phrases": trigger_phrases,
+                "confidence_threshold": 0.7,
+            },
+            "metadata": {
+                "title": title,
+                "description": description,
+                "category": category,
+                "tags": [],
+            },
+            "data": data,
+            "chart": chart,
+        })
 
         success = manager.save_template(template, site_id, overwrite=False)
 
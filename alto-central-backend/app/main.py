@@ -4,6 +4,7 @@ from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
@@ -16,6 +17,9 @@ from app.db.connections import (
     close_timescale,
     close_local_db,
 )
+from app.llm.client import get_anthropic_client
+from app.llm.prompts import get_system_prompt
+from app.llm.tools import get_tool_definitions
 
 
 @asynccontextmanager
@@ -29,9 +33,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     await init_timescale()
     await init_local_db()
 
+    llm_client = get_anthropic_client()
+    if settings.ANTHROPIC_CACHE_KEEPALIVE and llm_client.is_configured:
+        llm_client.start_cache_keepalive(get_system_prompt(), get_tool_definitions())
+
     yield
 
     # Shutdown
+    await llm_client.stop_cache_keepalive()
     await close_timescale()
     await close_local_db()
 
@@ -45,6 +54,8 @@ def create_application() -> FastAPI:
         docs_url="/docs",
         redoc_url="/redoc",
         openapi_url="/openapi.json",
+        # orjson for every JSON response (timeseries payloads are large)
+        default_response_class=ORJSONResponse,
         lifespan=lifespan,
     )
 
@@ -5,9 +5,11 @@ Fetches historical data from TimescaleDB for model training.
 
 import logging
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+
 try:
     import pandas as pd
 
@@ -20,6 +22,55 @@ from app.core import get_table_for_resolution
 
 logger = logging.getLogger(__name__)
 
+# ChillerTrainingData field -> chiller datapoint, for single-chiller training
+CHILLER_DATAPOINT_FIELDS: Dict[str, str] = {
+    "power": "power",
+    "percentage_rla": "percentage_rla",
+    "status": "status_read",
+    "evap_lwt": "evap_leaving_water_temperature",
+    "evap_ewt": "evap_entering_water_temperature",
+    "cond_lwt": "cond_leaving_water_temperature",
+    "cond_ewt": "cond_entering_water_temperature",
+}
+
+
+def _chiller_bits(chiller_ids: List[str]) -> Dict[str, int]:
+    """Assign each chiller its own bit for running-combination masks."""
+    return {chiller_id: 1 << i for i, chiller_id in enumerate(chiller_ids)}
+
+
+def _running_masks(
+    status_rows: List[Dict[str, Any]],
+    chiller_bits: Dict[str, int],
+) -> Dict[datetime, int]:
+    """Bitmask of running chillers (status >= 1) per timestamp.
+
+    Every timestamp with a status row gets an entry, 0 when nothing runs.
+    For repeated (timestamp, chiller) rows the last status wins.
+    """
+    masks: Dict[datetime, int] = {}
+    for row in status_rows:
+        ts = row["timestamp"]
+        bit = chiller_bits[row["device_id"]]
+        if int(row["value"]) >= 1:
+            masks[ts] = masks.get(ts, 0) | bit
+        else:
+            masks[ts] = masks.get(ts, 0) & ~bit
+    return masks
+
+
+def _utc_datetime64(timestamps: List[datetime]) -> np.ndarray:
+    """Convert tz-aware datetimes to a naive-UTC datetime64[ns] array."""
+    return np.array(
+        [ts.astimezone(timezone.utc).replace(tzinfo=None) for ts in timestamps],
+        dtype="datetime64[ns]",
+    )
+
+
+def _column(rows: List[Any], field: str, dtype: Any) -> np.ndarray:
+    """Read one field of every row into a typed array."""
+    return np.fromiter((row[field] for row in rows), dtype=dtype, count=len(rows))
+
 
 @dataclass
 class ChillerTrainingData:
@@ -27,17 +78,17 @@ class ChillerTrainingData:
 
     chiller_id: str
     site_id: str
-    timestamps: List[datetime]
-    power: List[float]  # kW
-    percentage_rla: List[float]  # %
-    evap_lwt: List[float]  # Evaporator Leaving Water Temp (°F)
-    evap_ewt: List[float]  # Evaporator Entering Water Temp (°F)
-    cond_lwt: List[float]  # Condenser Leaving Water Temp (°F)
-    cond_ewt: List[float]  # Condenser Entering Water Temp (°F)
-    status: List[int]  # 0/1
-    cooling_load: List[float]  # RT (from plant)
-    chs: List[float]  # Chilled water supply temp (°F)
-    cds: List[float]  # Condenser water supply temp (°F)
+    timestamps: np.ndarray  # datetime64[ns], UTC
+    power: np.ndarray  # kW
+    percentage_rla: np.ndarray  # %
+    evap_lwt: np.ndarray  # Evaporator Leaving Water Temp (°F)
+    evap_ewt: np.ndarray  # Evaporator Entering Water Temp (°F)
+    cond_lwt: np.ndarray  # Condenser Leaving Water Temp (°F)
+    cond_ewt: np.ndarray  # Condenser Entering Water Temp (°F)
+    status: np.ndarray  # int8, 0/1
+    cooling_load: np.ndarray  # RT (from plant)
+    chs: np.ndarray  # Chilled water supply temp (°F)
+    cds: np.ndarray  # Condenser water supply temp (°F)
 
     def to_dataframe(self) -> "pd.DataFrame":
         """Convert to pandas DataFrame for model training."""
@@ -46,7 +97,7 @@ class ChillerTrainingData:
 
         return pd.DataFrame(
             {
-                "timestamp": self.timestamps,
+                "timestamp": pd.DatetimeIndex(self.timestamps).tz_localize("UTC"),
                 "power": self.power,
                 "percentage_rla": self.percentage_rla,
                 "evap_lwt": self.evap_lwt,
@@ -57,7 +108,8 @@ class ChillerTrainingData:
                 "cooling_load": self.cooling_load,
                 "chs": self.chs,
                 "cds": self.cds,
-            }
+            },
+            copy=False,
         )
 
 
@@ -93,133 +145,84 @@ class MLDataFetcher:
         timescale = await get_timescale(self.site_id)
         table_name = get_table_for_resolution(resolution)
 
-        # Query chiller-specific data
-        chiller_query = f"""
-            SELECT timestamp, datapoint, value
-            FROM {table_name}
-            WHERE site_id = $1
-              AND device_id = $2
-              AND datapoint IN (
-                  'power', 'percentage_rla', 'status_read',
-                  'evap_leaving_water_temperature', 'evap_entering_water_temperature',
-                  'cond_leaving_water_temperature', 'cond_entering_water_temperature'
-              )
-              AND timestamp >= $3
-              AND timestamp < $4
-            ORDER BY timestamp
-        """
-
-        # Query loop temperatures
-        chs_query = f"""
-            SELECT timestamp, value
-            FROM {table_name}
-            WHERE site_id = $1
-              AND device_id = 'chilled_water_loop'
-              AND datapoint = 'supply_water_temperature'
-              AND timestamp >= $2
-              AND timestamp < $3
-            ORDER BY timestamp
-        """
-
-        cds_query = f"""
-            SELECT timestamp, value
-            FROM {table_name}
-            WHERE site_id = $1
-              AND device_id = 'condenser_water_loop'
-              AND datapoint = 'supply_water_temperature'
-              AND timestamp >= $2
-              AND timestamp < $3
-            ORDER BY timestamp
-        """
-
-        # Query plant cooling load
-        cooling_load_query = f"""
-            SELECT timestamp, value
-            FROM {table_name}
-            WHERE site_id = $1
-              AND device_id = 'plant'
-              AND datapoint = 'cooling_rate'
-              AND timestamp >= $2
-              AND timestamp < $3
-            ORDER BY timestamp
+        # One query: pivot chiller datapoints into columns with FILTER
+        # aggregates and join loop temperatures and plant cooling load on
+        # timestamp. Timestamps missing power or status are skipped; other
+        # missing values default to 0.0.
+        chiller_columns = ",\n                       ".join(
+            f"MAX(value) FILTER (WHERE datapoint = '{datapoint}') AS {field}"
+            for field, datapoint in CHILLER_DATAPOINT_FIELDS.items()
+        )
+        query = f"""
+            WITH chiller AS (
+                SELECT timestamp,
+                       {chiller_columns}
+                FROM {table_name}
+                WHERE site_id = $1
+                  AND device_id = $2
+                  AND datapoint = ANY($3)
+                  AND timestamp >= $4
+                  AND timestamp < $5
+                GROUP BY timestamp
+            ),
+            plant AS (
+                SELECT timestamp,
+                       MAX(value) FILTER (WHERE device_id = 'plant') AS cooling_load,
+                       MAX(value) FILTER (WHERE device_id = 'chilled_water_loop') AS chs,
+                       MAX(value) FILTER (WHERE device_id = 'condenser_water_loop') AS cds
+                FROM {table_name}
+                WHERE site_id = $1
+                  AND (
+                      (device_id = 'plant' AND datapoint = 'cooling_rate')
+                      OR (device_id IN ('chilled_water_loop', 'condenser_water_loop')
+                          AND datapoint = 'supply_water_temperature')
+                  )
+                  AND timestamp >= $4
+                  AND timestamp < $5
+                GROUP BY timestamp
+            )
+            SELECT c.timestamp,
+                   c.power,
+                   COALESCE(c.percentage_rla, 0.0) AS percentage_rla,
+                   trunc(c.status)::int AS status,
+                   COALESCE(c.evap_lwt, 0.0) AS evap_lwt,
+                   COALESCE(c.evap_ewt, 0.0) AS evap_ewt,
+                   COALESCE(c.cond_lwt, 0.0) AS cond_lwt,
+                   COALESCE(c.cond_ewt, 0.0) AS cond_ewt,
+                   COALESCE(p.cooling_load, 0.0) AS cooling_load,
+                   COALESCE(p.chs, 0.0) AS chs,
+                   COALESCE(p.cds, 0.0) AS cds
+            FROM chiller c
+            LEFT JOIN plant p USING (timestamp)
+            WHERE c.power IS NOT NULL
+              AND c.status IS NOT NULL
+            ORDER BY c.timestamp
         """
 
-        # Execute all queries
-        chiller_rows = await timescale.fetch(
-            chiller_query, self.site_id, chiller_id, start_date, end_date
-        )
-        chs_rows = await timescale.fetch(chs_query, self.site_id, start_date, end_date)
-        cds_rows = await timescale.fetch(cds_query, self.site_id, start_date, end_date)
-        cooling_load_rows = await timescale.fetch(
-            cooling_load_query, self.site_id, start_date, end_date
+        rows = await timescale.fetch(
+            query, self.site_id, chiller_id, list(CHILLER_DATAPOINT_FIELDS.values()),
+            start_date, end_date,
         )
-
-        # Convert to lookup dicts by timestamp
-        chs_lookup = {row["timestamp"]: row["value"] for row in chs_rows}
-        cds_lookup = {row["timestamp"]: row["value"] for row in cds_rows}
-        cooling_load_lookup = {
-            row["timestamp"]: row["value"] for row in cooling_load_rows
-        }
-
-        # Pivot chiller data by timestamp
-        chiller_data: Dict[datetime, Dict[str, float]] = {}
-        for row in chiller_rows:
-            ts = row["timestamp"]
-            if ts not in chiller_data:
-                chiller_data[ts] = {}
-            chiller_data[ts][row["datapoint"]] = row["value"]
-
-        # Build result arrays
-        timestamps = []
-        power = []
-        percentage_rla = []
-        evap_lwt = []
-        evap_ewt = []
-        cond_lwt = []
-        cond_ewt = []
-        status = []
-        cooling_load = []
-        chs = []
-        cds = []
-
-        for ts in sorted(chiller_data.keys()):
-            data = chiller_data[ts]
-
-            # Skip if missing critical data
-            if "power" not in data or "status_read" not in data:
-                continue
-
-            timestamps.append(ts)
-            power.append(data.get("power", 0.0))
-            percentage_rla.append(data.get("percentage_rla", 0.0))
-            evap_lwt.append(data.get("evap_leaving_water_temperature", 0.0))
-            evap_ewt.append(data.get("evap_entering_water_temperature", 0.0))
-            cond_lwt.append(data.get("cond_leaving_water_temperature", 0.0))
-            cond_ewt.append(data.get("cond_entering_water_temperature", 0.0))
-            status.append(int(data.get("status_read", 0)))
-            cooling_load.append(cooling_load_lookup.get(ts, 0.0))
-            chs.append(chs_lookup.get(ts, 0.0))
-            cds.append(cds_lookup.get(ts, 0.0))
-
         logger.info(
-            f"Fetched {len(timestamps)} data points for {chiller_id} "
+            f"Fetched {len(rows)} data points for {chiller_id} "
             f"from {start_date} to {end_date}"
         )
 
+        # Values stay float64: the regressions are fit on these directly
         return ChillerTrainingData(
             chiller_id=chiller_id,
             site_id=self.site_id,
-            timestamps=timestamps,
-            power=power,
-            percentage_rla=percentage_rla,
-            evap_lwt=evap_lwt,
-            evap_ewt=evap_ewt,
-            cond_lwt=cond_lwt,
-            cond_ewt=cond_ewt,
-            status=status,
-            cooling_load=cooling_load,
-            chs=chs,
-            cds=cds,
+            timestamps=_utc_datetime64([row["timestamp"] for row in rows]),
+            power=_column(rows, "power", np.float64),
+            percentage_rla=_column(rows, "percentage_rla", np.float64),
+            evap_lwt=_column(rows, "evap_lwt", np.float64),
+            evap_ewt=_column(rows, "evap_ewt", np.float64),
+            cond_lwt=_column(rows, "cond_lwt", np.float64),
+            cond_ewt=_column(rows, "cond_ewt", np.float64),
+            status=_column(rows, "status", np.int8),
+            cooling_load=_column(rows, "cooling_load", np.float64),
+            chs=_column(rows, "chs", np.float64),
+            cds=_column(rows, "cds", np.float64),
         )
 
     async def fetch_combination_training_data(
@@ -248,116 +251,81 @@ class MLDataFetcher:
         timescale = await get_timescale(self.site_id)
         table_name = get_table_for_resolution(resolution)
 
-        # First, get all chiller status data
         all_chillers = await self.get_available_chillers()
 
-        # Query status for all chillers
-        status_query = f"""
-            SELECT timestamp, device_id, value
-            FROM {table_name}
-            WHERE site_id = $1
-              AND device_id = ANY($2)
-              AND datapoint = 'status_read'
-              AND timestamp >= $3
-              AND timestamp < $4
-            ORDER BY timestamp
+        # Chiller i of all_chillers owns bit 1 << i (see _chiller_bits);
+        # a chiller unknown to the site can never match
+        chiller_bits = _chiller_bits(all_chillers)
+        target_mask = 0
+        for chiller_id in chiller_ids:
+            target_mask |= chiller_bits.get(chiller_id, -1)
+
+        # One query: keep timestamps whose running-chiller bitmask is exactly
+        # the target, then pivot plant power/load and loop temperatures onto
+        # them with FILTER aggregates
+        query = f"""
+            WITH running AS (
+                SELECT timestamp
+                FROM {table_name}
+                WHERE site_id = $1
+                  AND device_id = ANY($2)
+                  AND datapoint = 'status_read'
+                  AND timestamp >= $3
+                  AND timestamp < $4
+                GROUP BY timestamp
+                HAVING COALESCE(
+                    bit_or(1::bigint << (array_position($2::text[], device_id) - 1))
+                        FILTER (WHERE value >= 1),
+                    0
+                ) = $5
+            ),
+            plant AS (
+                SELECT timestamp,
+                       MAX(value) FILTER (WHERE device_id = 'plant'
+                                          AND datapoint = 'power_all_chillers') AS power,
+                       MAX(value) FILTER (WHERE device_id = 'plant'
+                                          AND datapoint = 'cooling_rate') AS cooling_load,
+                       MAX(value) FILTER (WHERE device_id = 'chilled_water_loop') AS chs,
+                       MAX(value) FILTER (WHERE device_id = 'condenser_water_loop') AS cds
+                FROM {table_name}
+                WHERE site_id = $1
+                  AND (
+                      (device_id = 'plant'
+                       AND datapoint IN ('power_all_chillers', 'cooling_rate'))
+                      OR (device_id IN ('chilled_water_loop', 'condenser_water_loop')
+                          AND datapoint = 'supply_water_temperature')
+                  )
+                  AND timestamp >= $3
+                  AND timestamp < $4
+                GROUP BY timestamp
+            )
+            SELECT r.timestamp, p.power, p.cooling_load,
+                   p.chs AS evap_lwt, p.cds AS cond_ewt, p.chs, p.cds
+            FROM running r
+            LEFT JOIN plant p USING (timestamp)
+            ORDER BY r.timestamp
         """
 
-        status_rows = await timescale.fetch(
-            status_query, self.site_id, all_chillers, start_date, end_date
+        rows = await timescale.fetch(
+            query, self.site_id, all_chillers, start_date, end_date, target_mask
         )
 
-        # Build status lookup: timestamp -> {chiller_id: status}
-        status_by_ts: Dict[datetime, Dict[str, int]] = {}
-        for row in status_rows:
-            ts = row["timestamp"]
-            if ts not in status_by_ts:
-                status_by_ts[ts] = {}
-            status_by_ts[ts][row["device_id"]] = int(row["value"])
-
-        # Find timestamps where exactly the specified chillers are running
-        target_set = set(chiller_ids)
-        valid_timestamps = []
-
-        for ts, statuses in status_by_ts.items():
-            running_chillers = {
-                ch for ch, status in statuses.items() if status >= 1
-            }
-            if running_chillers == target_set:
-                valid_timestamps.append(ts)
-
-        if not valid_timestamps:
+        if not rows:
             logger.warning(
                 f"No data found for combination {'+'.join(chiller_ids)}"
             )
             return pd.DataFrame()
 
         logger.info(
-            f"Found {len(valid_timestamps)} timestamps for combination "
+            f"Found {len(rows)} timestamps for combination "
             f"{'+'.join(chiller_ids)}"
         )
 
-        # Query plant-level data for valid timestamps
-        plant_query = f"""
-            SELECT timestamp, datapoint, value
-            FROM {table_name}
-            WHERE site_id = $1
-              AND device_id = 'plant'
-              AND datapoint IN ('power_all_chillers', 'cooling_rate')
-              AND timestamp = ANY($2)
-            ORDER BY timestamp
-        """
+        df = pd.DataFrame([dict(row) for row in rows])
 
-        plant_rows = await timescale.fetch(
-            plant_query, self.site_id, valid_timestamps
-        )
-
-        # Query loop temperatures
-        loop_query = f"""
-            SELECT timestamp, device_id, datapoint, value
-            FROM {table_name}
-            WHERE site_id = $1
-              AND device_id IN ('chilled_water_loop', 'condenser_water_loop')
-              AND datapoint = 'supply_water_temperature'
-              AND timestamp = ANY($2)
-            ORDER BY timestamp
-        """
-
-        loop_rows = await timescale.fetch(loop_query, self.site_id, valid_timestamps)
-
-        # Build result DataFrame
-        data: Dict[datetime, Dict[str, float]] = {}
-
-        for ts in valid_timestamps:
-            data[ts] = {"timestamp": ts}
-
-        for row in plant_rows:
-            ts = row["timestamp"]
-            if ts in data:
-                if row["datapoint"] == "power_all_chillers":
-                    data[ts]["power"] = row["value"]
-                elif row["datapoint"] == "cooling_rate":
-                    data[ts]["cooling_load"] = row["value"]
-
-        for row in loop_rows:
-            ts = row["timestamp"]
-            if ts in data:
-                if row["device_id"] == "chilled_water_loop":
-                    data[ts]["evap_lwt"] = row["value"]
-                    data[ts]["chs"] = row["value"]
-                elif row["device_id"] == "condenser_water_loop":
-                    data[ts]["cond_ewt"] = row["value"]
-                    data[ts]["cds"] = row["value"]
-
-        # Convert to DataFrame
-        df = pd.DataFrame(list(data.values()))
-
-        if df.empty:
-            return df
-
-        # Fill missing columns
+        # Columns with no data at all default to 0.0
         for col in ["power", "cooling_load", "evap_lwt", "cond_ewt", "chs", "cds"]:
-            if col not in df.columns:
+            if df[col].isna().all():
                 df[col] = 0.0
 
         return df
@@ -415,21 +383,13 @@ class MLDataFetcher:
             query, self.site_id, all_chillers, start_date, end_date
         )
 
-        # Build combinations
-        combinations: set = set()
-        status_by_ts: Dict[datetime, Dict[str, int]] = {}
-
-        for row in rows:
-            ts = row["timestamp"]
-            if ts not in status_by_ts:
-                status_by_ts[ts] = {}
-            status_by_ts[ts][row["device_id"]] = int(row["value"])
-
-        for ts, statuses in status_by_ts.items():
-            running = tuple(
-                sorted(ch for ch, status in statuses.items() if status >= 1)
-            )
-            if running:
-                combinations.add(running)
+        # Build combinations as running bitmasks, decoded once at the end
+        chiller_bits = _chiller_bits(all_chillers)
+        masks = set(_running_masks(rows, chiller_bits).values())
+        masks.discard(0)
 
+        combinations = [
+            tuple(sorted(ch for ch, bit in chiller_bits.items() if mask & bit))
+            for mask in masks
+        ]
         return sorted(combinations, key=lambda x: (len(x), x))
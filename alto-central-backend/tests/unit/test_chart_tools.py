@@ -0,0 +1,44 @@
+"""Tests for chart tool helpers."""
+
+import math
+
+from app.llm.tools.chart_tools import _compact_floats
+
+
+def test_compact_floats_rounds_long_floats():
+    """Long float64 output is shortened to 6 significant digits."""
+    assert _compact_floats([412.38699999999994, -0.000123456789]) == [
+        412.387,
+        -0.000123457,
+    ]
+
+
+def test_compact_floats_keeps_ints():
+    """Ints pass through unchanged, also when mixed with floats."""
+    assert _compact_floats([1, 2, 3]) == [1, 2, 3]
+    assert _compact_floats([123456789, 1.23456789]) == [123456789, 1.23457]
+    assert all(type(v) is int for v in _compact_floats([1, 2, 3]))
+
+
+def test_compact_floats_keeps_epoch_ms():
+    """Distinct epoch-millisecond x values never collapse into one."""
+    ints = [1704067200000, 1704067260000]
+    floats = [1704067200000.0, 1704067260000.0]
+    assert _compact_floats(ints) == ints
+    assert _compact_floats(floats) == floats
+
+
+def test_compact_floats_keeps_large_magnitudes():
+    """Floats with 6+ integer digits are not rounded."""
+    assert _compact_floats([123456789.123, 123456.78]) == [123456789.123, 123456.78]
+
+
+def test_compact_floats_missing_values():
+    """None and NaN become None."""
+    assert _compact_floats([None, math.nan, 0.0]) == [None, None, 0.0]
+
+
+def test_compact_floats_non_numeric_lists_unchanged():
+    """Category strings and bools keep their axis type."""
+    assert _compact_floats(["2024", "2025"]) == ["2024", "2025"]
+    assert _compact_floats([True, 1.0]) == [True, 1.0]